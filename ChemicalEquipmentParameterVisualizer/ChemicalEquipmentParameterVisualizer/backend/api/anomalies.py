@@ -0,0 +1,86 @@
+"""Vectorized anomaly rules evaluated over a parsed upload.
+
+``rules`` has the shape of settings.ANOMALY_RULES:
+
+    {
+        'limits': {'Pump': {'Pressure': [2, 10]}, '*': {'Temperature': [None, 200]}},
+        'zscore': 3.0,
+        'iqr': 1.5,
+    }
+
+``limits`` gives [low, high] bounds per Type and parameter, with ``*``
+applying to types without their own bound and None leaving a side open.
+``zscore`` and ``iqr`` flag values more than that many standard deviations
+from their Type's mean, or IQRs outside its quartiles; 0 disables them.
+"""
+import numpy as np
+import pandas as pd
+
+from .parsing import NUMERIC_COLUMNS
+
+LIMIT = 'limit'
+ZSCORE = 'zscore'
+IQR = 'iqr'
+RULES = (LIMIT, ZSCORE, IQR)
+
+ANOMALY_COLUMNS = ['position', 'parameter', 'rule', 'value', 'low', 'high']
+
+
+def empty_anomalies():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in zip(
+        ANOMALY_COLUMNS, ['int64', 'object', 'object', 'float64', 'float64', 'float64'])})
+
+
+def limit_bounds(types, limits, column):
+    # Bounds are looked up once per category; code -1 (missing Type) picks
+    # the trailing default
+    default = limits.get('*', {}).get(column, [None, None])
+    per_category = [limits.get(eq_type, {}).get(column, default) for eq_type in types.cat.categories] + [default]
+    low, high = np.array(per_category, dtype=np.float64).reshape(-1, 2).T
+    codes = types.cat.codes.to_numpy()
+    return low[codes], high[codes]
+
+
+def grouped(frame, column, how, *args):
+    return frame.groupby('Type', observed=True)[column].transform(how, *args).to_numpy(dtype=np.float64)
+
+
+def rule_bounds(frame, rules, column):
+    limits = rules.get('limits') or {}
+    if limits:
+        yield (LIMIT, *limit_bounds(frame['Type'].astype('category'), limits, column))
+
+    z = rules.get('zscore') or 0
+    if z:
+        mean, std = grouped(frame, column, 'mean'), grouped(frame, column, 'std')
+        yield ZSCORE, mean - z * std, mean + z * std
+
+    k = rules.get('iqr') or 0
+    if k:
+        q1, q3 = grouped(frame, column, 'quantile', 0.25), grouped(frame, column, 'quantile', 0.75)
+        yield IQR, q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+
+
+def detect_anomalies(frame, rules):
+    """One row per (frame position, parameter, rule) that flags a value,
+    with the bounds it fell outside (NaN for an open side)."""
+    if not len(frame):
+        return empty_anomalies()
+
+    found = []
+    for column in NUMERIC_COLUMNS:
+        values = frame[column].to_numpy(dtype=np.float64)
+        for rule, low, high in rule_bounds(frame, rules, column):
+            positions = np.flatnonzero((values < low) | (values > high))
+            if len(positions):
+                found.append(pd.DataFrame({
+                    'position': positions,
+                    'parameter': column,
+                    'rule': rule,
+                    'value': values[positions],
+                    'low': low[positions],
+                    'high': high[positions],
+                }))
+    if not found:
+        return empty_anomalies()
+    return pd.concat(found, ignore_index=True).sort_values(['position', 'parameter', 'rule'], ignore_index=True)
@@ -0,0 +1,184 @@
+"""Async versions of the dataset list/detail/summary/PDF and upload endpoints,
+routed in place of the DRF views when ASYNC_VIEWS is set and the app runs
+under an ASGI server.
+
+A request holds no thread while it waits on its client or on other work:
+queries run through sync_to_async, and CSV parsing and PDF rendering run in
+the bounded offload pool (tasks.offload). Responses match the DRF views
+byte for byte and share their cache entries and ETags; representations
+other than plain JSON (columnar, msgpack, Arrow, the browsable API) are
+handed to the DRF view.
+"""
+import asyncio
+import io
+import os
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAcceptable, NotFound
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import metrics
+from .cache import get_or_build, make_etag, not_modified, set_validators, variant_key
+from .filters import TRUE_VALUES
+from .jobs import start_ingest_job
+from .models import Dataset
+from .renderers import DATASET_RENDERERS
+from .reports import cached_report, render_report, report_options
+from .serializers import DatasetDetailSerializer, DatasetSerializer, IngestJobSerializer
+from .tasks import offload
+from .views import (DatasetViewSet, dataset_list_queryset, dataset_summary, ingest_upload, paginate_datasets,
+                    request_uploader)
+
+negotiation = DefaultContentNegotiation()
+json_renderer = JSONRenderer()
+
+drf_views = {
+    'list': DatasetViewSet.as_view({'get': 'list'}, basename='dataset', detail=False),
+    'retrieve': DatasetViewSet.as_view({'get': 'retrieve'}, basename='dataset', detail=True),
+    'summary': DatasetViewSet.as_view({'get': 'summary'}, basename='dataset', detail=True),
+}
+
+def json_response(data, status=status.HTTP_200_OK):
+    response = HttpResponse(json_renderer.render(data), status=status, content_type=json_renderer.media_type)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+def not_found():
+    return json_response({'detail': 'No Dataset matches the given query.'}, status.HTTP_404_NOT_FOUND)
+
+def wants_json(request):
+    try:
+        renderer, _ = negotiation.select_renderer(Request(request), [renderer() for renderer in DATASET_RENDERERS])
+    except NotAcceptable:
+        return False
+    return renderer.format == json_renderer.format
+
+async def delegate(action, request, **kwargs):
+    return await sync_to_async(drf_views[action])(request, **kwargs)
+
+async def cached_json(request, action, dataset_id, last_modified, fingerprint, build):
+    # Same variant and ETag as DatasetViewSet.cached_response for a JSON response
+    variant = variant_key(action, request.GET)
+    etag = make_etag(fingerprint, variant, json_renderer.format)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = json_response(await sync_to_async(get_or_build)(dataset_id, f'{fingerprint}:{variant}', build))
+    return set_validators(response, etag, last_modified)
+
+async def cached_detail_json(request, action, pk, build):
+    updated_at = await Dataset.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return not_found()
+    return await cached_json(request, action, pk, updated_at, f'{pk}-{updated_at.timestamp()}', build)
+
+@require_safe
+async def dataset_list(request):
+    if not wants_json(request):
+        return await delegate('list', request)
+    try:
+        queryset = dataset_list_queryset(request.GET)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+    state = await queryset.aaggregate(count=Count('id'), max_id=Max('id'), last_modified=Max('updated_at'))
+    if state['last_modified'] is None:
+        return json_response(await sync_to_async(paginate_datasets)(Request(request), queryset))
+    fingerprint = f"{state['count']}-{state['max_id']}-{state['last_modified'].timestamp()}"
+    try:
+        return await cached_json(request, 'list', None, state['last_modified'], fingerprint,
+                                 lambda: paginate_datasets(Request(request), queryset))
+    except NotFound as e:
+        # An invalid cursor
+        return json_response({'detail': e.detail}, status.HTTP_404_NOT_FOUND)
+
+@require_safe
+async def dataset_detail(request, pk):
+    if not wants_json(request):
+        return await delegate('retrieve', request, pk=pk)
+    include_rows = request.GET.get('include_rows', '').lower() in TRUE_VALUES
+    serializer_class = DatasetDetailSerializer if include_rows else DatasetSerializer
+    return await cached_detail_json(request, 'retrieve', pk,
+                                    lambda: serializer_class(get_object_or_404(Dataset, pk=pk)).data)
+
+@require_safe
+async def dataset_summary_view(request, pk):
+    if not wants_json(request):
+        return await delegate('summary', request, pk=pk)
+    return await cached_detail_json(request, 'summary', pk,
+                                    lambda: dataset_summary(get_object_or_404(Dataset, pk=pk)))
+
+async def stream_file(f, chunk_size=FileResponse.block_size):
+    loop = asyncio.get_running_loop()
+    try:
+        while chunk := await loop.run_in_executor(None, f.read, chunk_size):
+            yield chunk
+    finally:
+        f.close()
+
+@require_safe
+async def generate_pdf(request, pk):
+    try:
+        mode, top_n = report_options(request.GET)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+    dataset = await Dataset.objects.filter(pk=pk).afirst()
+    if dataset is None:
+        return not_found()
+
+    report = cached_report(dataset, mode, top_n)
+    if report is None:
+        metrics.increment('report_cache_misses')
+        report = io.BytesIO(await offload(render_report, dataset, mode, top_n))
+    size = report.seek(0, os.SEEK_END)
+    report.seek(0)
+    response = StreamingHttpResponse(stream_file(report), content_type='application/pdf')
+    response['Content-Length'] = size
+    response['Content-Disposition'] = content_disposition_header(True, f'{dataset.name}_report.pdf')
+    return response
+
+def authenticated_uploader(request):
+    # DRF's authenticators, so basic auth counts here as in the DRF views
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    return request_uploader(Request(request, authenticators=authenticators))
+
+def start_job(csv_file, uploaded_by):
+    job = start_ingest_job(csv_file, uploaded_by)
+    return job.id, IngestJobSerializer(job).data
+
+@csrf_exempt
+@require_POST
+async def upload_csv(request):
+    try:
+        uploaded_by = await sync_to_async(authenticated_uploader)(request)
+    except APIException as e:
+        return json_response({'detail': e.detail}, e.status_code)
+
+    # Parsing the multipart body reads the spooled upload from disk
+    files = await sync_to_async(getattr)(request, 'FILES')
+    if 'file' not in files:
+        return json_response({'error': 'No file provided'}, status.HTTP_400_BAD_REQUEST)
+
+    csv_file = files['file']
+
+    if not csv_file.name.endswith('.csv'):
+        return json_response({'error': 'File must be a CSV'}, status.HTTP_400_BAD_REQUEST)
+
+    if request.GET.get('async', '').lower() in TRUE_VALUES:
+        job_id, data = await sync_to_async(start_job)(csv_file, uploaded_by)
+        response = json_response(data, status.HTTP_202_ACCEPTED)
+        response['Location'] = request.build_absolute_uri(reverse('ingestjob-detail', args=[job_id]))
+        return response
+
+    payload, status_code = await offload(ingest_upload, csv_file, uploaded_by)
+    return json_response(payload, status_code)
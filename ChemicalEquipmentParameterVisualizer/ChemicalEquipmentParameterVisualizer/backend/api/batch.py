@@ -0,0 +1,192 @@
+import tarfile
+import tempfile
+import time
+import zipfile
+from functools import partial
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .cache import invalidate_dataset_list
+from .dedup import copy_hashed, find_duplicates, record_uploads
+from .models import Dataset
+from .parsing import error_body
+from .reports import schedule_report
+from .retention import apply_retention_after_upload
+from .tasks import get_process_pool
+from .utils import apply_summary, create_alerts, insert_rows
+from .workers import parse_csv_file
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar.gz', '.tgz', '.tar')
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+def is_csv_member(name):
+    path = PurePosixPath(name)
+    return path.suffix.lower() == '.csv' and not path.name.startswith('.') and '__MACOSX' not in path.parts
+
+def batch_too_large():
+    return ValueError(f'A batch may contain at most {settings.BATCH_MAX_BYTES:,} bytes of CSV data')
+
+class BoundedReader:
+    """Reads ``stream`` and fails once more than ``budget`` bytes came out
+    of it; archive headers can understate a member's size."""
+    def __init__(self, stream, budget):
+        self.stream = stream
+        self.budget = budget
+        self.size = 0
+
+    def read(self, size=-1):
+        block = self.stream.read(size)
+        self.size += len(block)
+        if self.size > self.budget:
+            raise batch_too_large()
+        return block
+
+def check_members(name, count):
+    if count > settings.BATCH_MAX_MEMBERS:
+        raise ValueError(f'{name}: archives may contain at most {settings.BATCH_MAX_MEMBERS} entries')
+
+def extract_sources(uploaded_files, directory):
+    """Write every CSV among the uploads (including archive members) to
+    ``directory`` and return ``(display name, path, SHA-256)`` triples."""
+    sources = []
+    written = 0
+
+    def add(name, stream, declared_size=0):
+        nonlocal written
+        if len(sources) >= settings.BATCH_MAX_FILES:
+            raise ValueError(f'A batch may contain at most {settings.BATCH_MAX_FILES} CSV files')
+        if written + declared_size > settings.BATCH_MAX_BYTES:
+            raise batch_too_large()
+        path = Path(directory) / f'{len(sources)}.csv'
+        reader = BoundedReader(stream, settings.BATCH_MAX_BYTES - written)
+        with open(path, 'wb') as f:
+            digest = copy_hashed(reader, f)
+        written += reader.size
+        sources.append((name, path, digest))
+
+    for uploaded in uploaded_files:
+        name = uploaded.name
+        lower = name.lower()
+        if lower.endswith('.csv'):
+            add(name, uploaded, uploaded.size)
+        elif lower.endswith('.zip'):
+            try:
+                with zipfile.ZipFile(uploaded) as archive:
+                    members = archive.infolist()
+                    check_members(name, len(members))
+                    for member in members:
+                        if not member.is_dir() and is_csv_member(member.filename):
+                            with archive.open(member) as stream:
+                                add(f'{name}/{member.filename}', stream, member.file_size)
+            except zipfile.BadZipFile:
+                raise ValueError(f'{name} is not a valid zip archive')
+        elif lower.endswith(ARCHIVE_SUFFIXES):
+            try:
+                with tarfile.open(fileobj=uploaded, mode='r:*') as archive:
+                    for count, member in enumerate(archive, start=1):
+                        check_members(name, count)
+                        if member.isfile() and is_csv_member(member.name):
+                            add(f'{name}/{member.name}', archive.extractfile(member), member.size)
+            except tarfile.TarError:
+                raise ValueError(f'{name} is not a valid tar archive')
+        else:
+            raise ValueError(f'{name}: files must be CSVs or zip/tar.gz archives of CSVs')
+
+    if not sources:
+        raise ValueError('No CSV files found in upload')
+    return sources
+
+def parse_sources(sources):
+    """Parse each source, concurrently in the process pool when there is
+    more than one, and return ``(name, parsed or None, error)`` triples in
+    upload order; the error is a response body."""
+    args = (settings.CSV_CHUNK_ROWS, settings.STATS_HISTOGRAM_BINS, settings.ANOMALY_RULES, settings.CSV_ENGINE,
+            settings.CSV_MAX_ROW_ERRORS)
+    if len(sources) > 1 and settings.PARSE_WORKERS > 1:
+        pool = get_process_pool()
+        calls = [pool.submit(parse_csv_file, str(path), *args).result for _, path in sources]
+    else:
+        calls = [partial(parse_csv_file, str(path), *args) for _, path in sources]
+
+    parsed = []
+    for (name, _), call in zip(sources, calls):
+        try:
+            parsed.append((name, call(), None))
+        except ValueError as e:
+            parsed.append((name, None, error_body(e)))
+    return parsed
+
+def process_batch(uploaded_files, uploaded_by=None):
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='batch-') as directory:
+        sources = extract_sources(uploaded_files, directory)
+        existing = find_duplicates(digest for _, _, digest in sources)
+        # Only the first CSV with given content is parsed; repeats within the
+        # batch alias the dataset created for it
+        first = {}
+        for index, (name, path, digest) in enumerate(sources):
+            if digest not in existing:
+                first.setdefault(digest, index)
+        with metrics.span('batch_parse'):
+            parsed = dict(zip(first, parse_sources([sources[index][:2] for index in first.values()])))
+    parse_ms = elapsed_ms(started)
+
+    results = []
+    created = []
+    aliases = []
+    insert_started = time.perf_counter()
+    with metrics.span('db_write'), transaction.atomic():
+        for index, (name, _, digest) in enumerate(sources):
+            if digest in existing:
+                results.append({'file': name, 'status': 'duplicate', 'dataset': existing[digest].id})
+                continue
+            _, result, error = parsed[digest]
+            if error is not None:
+                results.append({'file': name, 'status': 'failed', **error})
+                continue
+            if first[digest] != index:
+                entry = {'file': name, 'status': 'duplicate'}
+                results.append(entry)
+                aliases.append((digest, entry))
+                continue
+            dataset = Dataset(name=PurePosixPath(name).name, content_hash=digest, uploaded_by=uploaded_by)
+            apply_summary(dataset, result)
+            entry = {'file': name, 'status': 'created', 'rows': result['total_count'],
+                     'row_errors': result['parse_report']['error_count'], 'parse_ms': result['parse_ms']}
+            results.append(entry)
+            created.append((dataset, result, entry))
+
+        Dataset.objects.bulk_create([dataset for dataset, _, _ in created])
+        for dataset, result, entry in created:
+            rows_started = time.perf_counter()
+            create_alerts(dataset, result['anomalies'], insert_rows(dataset, result['rows']))
+            entry['dataset'] = dataset.id
+            entry['insert_ms'] = elapsed_ms(rows_started)
+    insert_ms = elapsed_ms(insert_started)
+
+    datasets = {dataset.content_hash: dataset.id for dataset, _, _ in created}
+    for digest, entry in aliases:
+        entry['dataset'] = datasets[digest]
+
+    if created:
+        invalidate_dataset_list()
+        for dataset, _, _ in created:
+            schedule_report(dataset.id)
+        apply_retention_after_upload()
+
+    duplicates = sum(entry['status'] == 'duplicate' for entry in results)
+    record_uploads(len(results), duplicates)
+    metrics.increment('rows_ingested', sum(result['total_count'] for _, result, _ in created))
+    metrics.increment('row_parse_errors', sum(result['parse_report']['error_count'] for _, result, _ in created))
+    return {
+        'created': len(created),
+        'duplicates': duplicates,
+        'failed': len(results) - len(created) - duplicates,
+        'results': results,
+        'timings': {'parse_ms': parse_ms, 'insert_ms': insert_ms, 'total_ms': elapsed_ms(started)},
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+
+LIST_GENERATION_KEY = 'datasets:list:generation'
+
+# Cache keys embed a generation token; invalidating replaces the token so every
+# variant cached under the old one becomes unreachable and ages out of the LRU.
+# A token lost to eviction is simply regenerated, which can only cause misses.
+
+def _generation(key):
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        token = cache.get(key)
+    return token
+
+def _dataset_generation_key(dataset_id):
+    return f'datasets:{dataset_id}:generation'
+
+def response_key(dataset_id, variant):
+    if dataset_id is None:
+        scope = f'list:{_generation(LIST_GENERATION_KEY)}'
+    else:
+        scope = f'{dataset_id}:{_generation(_dataset_generation_key(dataset_id))}'
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f'datasets:response:{scope}:{digest}'
+
+def variant_key(action, params, columnar=False):
+    """The variant a response is cached and tagged under; the sync and async
+    views both build it here so their cache entries and ETags stay shared."""
+    layout = 'columnar' if columnar else 'rows'
+    return f'{action}:{layout}?{sorted(params.lists())}'
+
+def get_or_build(dataset_id, variant, build):
+    key = response_key(dataset_id, variant)
+    data = cache.get(key)
+    if data is not None:
+        metrics.increment('cache_hits')
+        return data
+    metrics.increment('cache_misses')
+    data = build()
+    cache.set(key, data)
+    return data
+
+def invalidate_dataset_list():
+    cache.set(LIST_GENERATION_KEY, uuid.uuid4().hex, None)
+
+def invalidate_dataset(dataset_id):
+    cache.set(_dataset_generation_key(dataset_id), uuid.uuid4().hex, None)
+    invalidate_dataset_list()
+
+def cache_stats():
+    hits = metrics.get_counter('cache_hits')
+    misses = metrics.get_counter('cache_misses')
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+def not_modified(request, etag, last_modified):
+    return get_conditional_response(request, etag=etag, last_modified=last_modified.timestamp())
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
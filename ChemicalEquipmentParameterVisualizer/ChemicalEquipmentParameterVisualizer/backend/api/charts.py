@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from pandas.api.types import union_categoricals
+
+from .downsampling import DOWNSAMPLING_METHODS, downsample
+from .exports import iter_batches
+from .filters import FIELD_COLUMNS, NUMERIC_FIELDS, resolve_field
+from .parsing import NUMERIC_COLUMNS
+from .stats import box_plots_by_type, histograms
+
+DEFAULT_CHART_POINTS = 1000
+MAX_CHART_POINTS = 10000
+MAX_CHART_BINS = 200
+FRAME_CHUNK_ROWS = 100000
+
+def numeric_column(name):
+    field = resolve_field(name)
+    if field not in NUMERIC_FIELDS:
+        raise ValueError(f'{name} is not a numeric column')
+    return FIELD_COLUMNS[field]
+
+def bounded_int(params, name, default, low, high):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    return min(max(value, low), high)
+
+def chart_options(params):
+    method = params.get('method', 'lttb')
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"method must be one of: {', '.join(DOWNSAMPLING_METHODS)}")
+    return {
+        'x': numeric_column(params.get('x', 'Temperature')),
+        'y': numeric_column(params.get('y', 'Pressure')),
+        'points': bounded_int(params, 'points', DEFAULT_CHART_POINTS, 3, MAX_CHART_POINTS),
+        'method': method,
+        'bins': bounded_int(params, 'bins', settings.STATS_HISTOGRAM_BINS, 1, MAX_CHART_BINS),
+    }
+
+def load_frame(queryset, columns=NUMERIC_COLUMNS):
+    """Type and the given numeric columns of the rows, as a categorical and
+    float64 columns; only those columns are read from the database."""
+    values, types = [], []
+    for batch in iter_batches(queryset.order_by(), ['Type'] + columns, FRAME_CHUNK_ROWS):
+        frame = pd.DataFrame.from_records(batch, columns=['Type'] + columns)
+        values.append(frame[columns].to_numpy(dtype=np.float64))
+        types.append(frame['Type'].astype('category'))
+    frame = pd.DataFrame(np.concatenate(values) if values else np.empty((0, len(columns))), columns=columns)
+    frame['Type'] = union_categoricals(types) if types else pd.Categorical([])
+    return frame
+
+def scatter(frame, x, y, points, method):
+    present = frame[[x, y]].notna().all(axis=1).to_numpy()
+    xs = frame[x].to_numpy()[present]
+    order = np.argsort(xs, kind='stable')
+    xs = xs[order]
+    ys = frame[y].to_numpy()[present][order]
+    types = frame['Type'].to_numpy()[present][order]
+    keep = downsample(xs, ys, points, method)
+    return {
+        'x': x,
+        'y': y,
+        'method': method,
+        'total_points': int(len(xs)),
+        'points': {
+            x: xs[keep].tolist(),
+            y: ys[keep].tolist(),
+            'Type': [str(value) for value in types[keep]],
+        },
+    }
+
+def build_chart_data(queryset, x, y, points, method, bins, statistics=None):
+    """Chart data for the rows of ``queryset``. ``statistics`` are the ones
+    stored at upload, passed when the queryset is a whole dataset; their
+    histograms and box plots are reused, so only the x and y columns are read."""
+    statistics = statistics or {}
+    stored_histograms = statistics.get('histograms') if statistics.get('histogram_bins') == bins else None
+    stored_box_plots = statistics.get('box_plots')
+    if stored_histograms is not None and stored_box_plots is not None:
+        columns = [col for col in NUMERIC_COLUMNS if col in (x, y)]
+    else:
+        columns = NUMERIC_COLUMNS
+    frame = load_frame(queryset, columns)
+    return {
+        'total_count': int(len(frame)),
+        'histograms': stored_histograms if stored_histograms is not None else histograms(
+            frame[NUMERIC_COLUMNS].to_numpy(dtype=np.float64), bins),
+        # A missing Type is stored as '', which the upload statistics skip
+        'box_plots': stored_box_plots if stored_box_plots is not None else box_plots_by_type(
+            frame[frame['Type'] != '']),
+        'scatter': scatter(frame, x, y, points, method),
+    }
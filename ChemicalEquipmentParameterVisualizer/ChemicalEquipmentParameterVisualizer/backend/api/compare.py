@@ -0,0 +1,101 @@
+import json
+
+from .filters import parse_moment, split_param
+from .models import Dataset
+from .parsing import NUMERIC_COLUMNS
+
+MAX_COMPARE_DATASETS = 500
+
+# Dataset summary columns per parameter, reported as time series and deltas
+AVERAGE_FIELDS = {
+    'Flowrate': 'avg_flowrate',
+    'Pressure': 'avg_pressure',
+    'Temperature': 'avg_temperature',
+}
+
+def parse_ids(value):
+    try:
+        return [int(item) for item in split_param(value)]
+    except ValueError:
+        raise ValueError('ids must be a comma-separated list of integers')
+
+def compare_queryset(params):
+    queryset = Dataset.objects.all()
+    if params.get('ids'):
+        queryset = queryset.filter(id__in=parse_ids(params['ids']))
+    if params.get('since'):
+        queryset = queryset.filter(uploaded_at__gte=parse_moment('since', params['since']))
+    if params.get('until'):
+        queryset = queryset.filter(uploaded_at__lt=parse_moment('until', params['until']))
+    return queryset.order_by('-uploaded_at', '-id').values(
+        'id', 'name', 'uploaded_at', 'total_count', *AVERAGE_FIELDS.values(),
+        'equipment_type_distribution', 'statistics',
+    )[:MAX_COMPARE_DATASETS]
+
+def delta(baseline, latest):
+    if baseline is None or latest is None:
+        return {'baseline': baseline, 'latest': latest, 'change': None, 'percent': None}
+    change = latest - baseline
+    return {
+        'baseline': baseline,
+        'latest': latest,
+        'change': change,
+        'percent': change / baseline * 100 if baseline else None,
+    }
+
+def type_snapshot(record):
+    distribution = json.loads(record['equipment_type_distribution'])
+    by_type = json.loads(record['statistics']).get('by_type', {})
+    snapshot = {}
+    for eq_type in set(distribution) | set(by_type):
+        stats = by_type.get(eq_type, {})
+        snapshot[eq_type] = {
+            'count': distribution.get(eq_type, 0),
+            **{col: stats.get(col, {}).get('mean') for col in NUMERIC_COLUMNS},
+        }
+    return snapshot
+
+def compare_datasets(params, baseline_id=None):
+    """Time series and baseline-vs-latest deltas of the stored aggregates of
+    the selected datasets, oldest first, fetched with a single query."""
+    records = list(compare_queryset(params))[::-1]
+    if not records:
+        return None
+
+    snapshots = [type_snapshot(record) for record in records]
+    types = sorted(set().union(*snapshots))
+    metrics = {'total_count': 'total_count', **AVERAGE_FIELDS}
+
+    baseline_index = 0
+    if baseline_id is not None:
+        ids = [record['id'] for record in records]
+        if baseline_id not in ids:
+            raise ValueError('baseline must be one of the compared datasets')
+        baseline_index = ids.index(baseline_id)
+    baseline, latest = records[baseline_index], records[-1]
+    baseline_types, latest_types = snapshots[baseline_index], snapshots[-1]
+    empty_type = {'count': 0, **dict.fromkeys(NUMERIC_COLUMNS)}
+
+    return {
+        'datasets': [
+            {'id': record['id'], 'name': record['name'], 'uploaded_at': record['uploaded_at']}
+            for record in records
+        ],
+        'baseline': baseline['id'],
+        'latest': latest['id'],
+        'series': {name: [record[field] for record in records] for name, field in metrics.items()},
+        'deltas': {name: delta(baseline[field], latest[field]) for name, field in metrics.items()},
+        'by_type': {
+            eq_type: {
+                'series': {
+                    key: [snapshot.get(eq_type, empty_type)[key] for snapshot in snapshots]
+                    for key in empty_type
+                },
+                'deltas': {
+                    key: delta(baseline_types.get(eq_type, empty_type)[key], latest_types.get(eq_type, empty_type)[key])
+                    for key in empty_type
+                },
+            }
+            for eq_type in types
+        },
+    }
@@ -0,0 +1,55 @@
+"""Content-hash deduplication of uploads.
+
+Uploads are identified by the SHA-256 of their raw bytes, computed while
+they stream in, so re-uploading a CSV returns the dataset already built
+from it instead of parsing and storing the rows again.
+"""
+import hashlib
+
+from django.conf import settings
+
+from . import metrics
+from .models import Dataset
+from .parsing import as_chunks
+
+HASH_BLOCK_SIZE = 1 << 16
+
+
+def content_hash(csv_source):
+    digest = hashlib.sha256()
+    for chunk in as_chunks(csv_source):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_hashed(stream, f):
+    """Copy ``stream`` to ``f`` and return the SHA-256 of what was copied."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+        f.write(block)
+    return digest.hexdigest()
+
+
+def find_duplicates(digests):
+    """Map each of ``digests`` that is already stored to the newest dataset
+    with that content, with a single query."""
+    digests = set(digests)
+    if not settings.UPLOAD_DEDUP or not digests:
+        return {}
+
+    found = {}
+    for dataset in Dataset.objects.filter(content_hash__in=digests).order_by('uploaded_at', 'id'):
+        found[dataset.content_hash] = dataset
+    return found
+
+
+def find_duplicate(digest):
+    dataset = find_duplicates([digest]).get(digest)
+    record_uploads(1, int(dataset is not None))
+    return dataset
+
+
+def record_uploads(count, duplicates):
+    metrics.increment('upload_dedup_hits', duplicates)
+    metrics.increment('upload_dedup_misses', count - duplicates)
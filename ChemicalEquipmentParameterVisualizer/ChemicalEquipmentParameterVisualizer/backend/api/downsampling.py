@@ -0,0 +1,58 @@
+"""Point-budget downsampling for chart series.
+
+Both functions take ``x`` sorted ascending and return the indices of the
+points to keep, in ascending order.
+"""
+import numpy as np
+
+DOWNSAMPLING_METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets (Steinarsson, 2013): keeps the first
+    and last points and, from each of ``threshold - 2`` equal buckets, the
+    point forming the largest triangle with the previous pick and the mean
+    of the next bucket."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def minmax(x, y, threshold):
+    """Keeps the first and last points and the lowest and highest ``y`` of
+    each of ``(threshold - 2) // 2`` equal buckets, which preserves spikes
+    that LTTB can average away."""
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    bounds = np.linspace(0, n, (threshold - 2) // 2 + 1).astype(np.int64)
+    starts = bounds[:-1]
+    lows = np.empty(len(starts), dtype=np.int64)
+    highs = np.empty(len(starts), dtype=np.int64)
+    for bucket, (start, end) in enumerate(zip(starts, bounds[1:])):
+        lows[bucket] = start + int(y[start:end].argmin())
+        highs[bucket] = start + int(y[start:end].argmax())
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample(x, y, threshold, method='lttb'):
+    return lttb(x, y, threshold) if method == 'lttb' else minmax(x, y, threshold)
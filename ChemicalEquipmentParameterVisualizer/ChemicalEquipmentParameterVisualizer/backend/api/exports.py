@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from .models import COLUMN_FIELDS
+from .parsing import NUMERIC_COLUMNS
+from .renderers import pa
+
+# Rows fetched from the database and encoded per yielded chunk; Parquet row
+# groups are larger because each one carries its own column statistics
+EXPORT_CHUNK_ROWS = 5000
+PARQUET_ROW_GROUP_ROWS = 100000
+
+def iter_batches(queryset, columns, size):
+    rows = queryset.values_list(*[COLUMN_FIELDS[col] for col in columns]).iterator(chunk_size=EXPORT_CHUNK_ROWS)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def iter_csv(queryset, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in iter_batches(queryset, columns, EXPORT_CHUNK_ROWS):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_ndjson(queryset, columns):
+    for batch in iter_batches(queryset, columns, EXPORT_CHUNK_ROWS):
+        yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in batch).encode('utf-8')
+
+class ByteSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every row
+    group, so the Parquet file never exists in memory as a whole."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def parquet_schema(columns):
+    return pa.schema([(col, pa.float64() if col in NUMERIC_COLUMNS else pa.string()) for col in columns])
+
+def iter_parquet(queryset, columns):
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(columns)
+    sink = ByteSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in iter_batches(queryset, columns, PARQUET_ROW_GROUP_ROWS):
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+EXPORTERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+    'parquet': iter_parquet,
+}
@@ -0,0 +1,107 @@
+from datetime import datetime, time
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .anomalies import RULES
+from .models import COLUMN_FIELDS, EquipmentAlert
+
+TRUE_VALUES = ('true', '1', 'yes')
+
+NUMERIC_FIELDS = ['flowrate', 'pressure', 'temperature']
+
+# Accept both CSV headers ("Equipment Name") and field names ("equipment_name")
+FIELD_ALIASES = {**{col.lower(): field for col, field in COLUMN_FIELDS.items()},
+                 **{field: field for field in COLUMN_FIELDS.values()}}
+FIELD_COLUMNS = {field: col for col, field in COLUMN_FIELDS.items()}
+
+def split_param(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def parse_moment(name, value):
+    moment = parse_datetime(value)
+    if moment is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+        moment = datetime.combine(date, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+def resolve_field(name):
+    field = FIELD_ALIASES.get(name.strip().lower())
+    if field is None:
+        raise ValueError(f'Unknown column: {name}')
+    return field
+
+def parse_columns(params):
+    if not params.get('fields'):
+        return list(COLUMN_FIELDS)
+    return [FIELD_COLUMNS[resolve_field(name)] for name in split_param(params['fields'])]
+
+def filter_datasets(queryset, params):
+    if params.get('name'):
+        queryset = queryset.filter(name__icontains=params['name'])
+    if params.get('since'):
+        queryset = queryset.filter(uploaded_at__gte=parse_moment('since', params['since']))
+    if params.get('until'):
+        queryset = queryset.filter(uploaded_at__lt=parse_moment('until', params['until']))
+    if params.get('uploader'):
+        queryset = queryset.filter(uploaded_by__username=params['uploader'])
+    return queryset
+
+def has_row_filters(params):
+    return any(params.get(name) not in (None, '') for name in
+               ['type', 'flagged', *(f'{field}_{suffix}' for field in NUMERIC_FIELDS for suffix in ('min', 'max'))])
+
+def filter_rows(queryset, params):
+    if params.get('type'):
+        queryset = queryset.filter(equipment_type__in=split_param(params['type']))
+    
+    for field in NUMERIC_FIELDS:
+        for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+            value = params.get(f'{field}_{suffix}')
+            if value in (None, ''):
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f'{field}_{suffix} must be a number')
+            queryset = queryset.filter(**{f'{field}__{lookup}': value})
+    
+    if params.get('flagged', '').lower() in TRUE_VALUES:
+        queryset = queryset.filter(Exists(EquipmentAlert.objects.filter(row=OuterRef('pk'))))
+    
+    return queryset
+
+def filter_alerts(queryset, params):
+    if params.get('rule'):
+        rules = split_param(params['rule'])
+        for rule in rules:
+            if rule not in RULES:
+                raise ValueError(f"rule must be one of: {', '.join(RULES)}")
+        queryset = queryset.filter(rule__in=rules)
+    
+    if params.get('parameter'):
+        parameters = []
+        for name in split_param(params['parameter']):
+            field = resolve_field(name)
+            if field not in NUMERIC_FIELDS:
+                raise ValueError(f'{name} is not a numeric column')
+            parameters.append(FIELD_COLUMNS[field])
+        queryset = queryset.filter(parameter__in=parameters)
+    
+    if params.get('type'):
+        queryset = queryset.filter(row__equipment_type__in=split_param(params['type']))
+    
+    return queryset
+
+def order_rows(queryset, params):
+    ordering = params.get('ordering')
+    if not ordering:
+        return queryset.order_by('id')
+    descending = ordering.startswith('-')
+    field = resolve_field(ordering.lstrip('-'))
+    return queryset.order_by(f"{'-' if descending else ''}{field}", 'id')
@@ -0,0 +1,124 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .dedup import copy_hashed, find_duplicate
+from .models import IngestJob
+from .tasks import submit
+from .utils import process_csv_data
+
+LOST_JOB_ERROR = 'The server stopped before this job finished; upload the file again'
+
+# Jobs waiting in this process's queue. The progress entry doubles as their
+# heartbeat, refreshed while jobs ahead of them run, so a long queue is not
+# mistaken for a lost one.
+_queued = set()
+
+def progress_cache():
+    return caches['jobs']
+
+def spool_path(job_id):
+    return Path(settings.UPLOAD_SPOOL_DIR) / f'{job_id}.csv'
+
+def progress_key(job_id):
+    return f'jobs:{job_id}:rows_processed'
+
+def heartbeat(job_ids):
+    progress_cache().set_many({progress_key(job_id): 0 for job_id in job_ids}, settings.JOB_STALE_SECONDS)
+
+def enqueue(job_id, *args):
+    _queued.add(job_id)
+    heartbeat([job_id])
+    submit(run_ingest_job, job_id, *args)
+
+def get_progress(job):
+    if job.status == IngestJob.RUNNING:
+        return progress_cache().get(progress_key(job.id), job.rows_processed)
+    return job.rows_processed
+
+def start_ingest_job(uploaded_file, uploaded_by=None):
+    job = IngestJob.objects.create(filename=uploaded_file.name)
+    path = spool_path(job.id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        uploaded_file.seek(0)
+        digest = copy_hashed(uploaded_file, f)
+    
+    existing = find_duplicate(digest)
+    if existing is not None:
+        os.remove(path)
+        job.dataset = existing
+        job.rows_processed = existing.total_count
+        job.duplicate = True
+        job.status = IngestJob.SUCCEEDED
+        job.save()
+        return job
+    
+    transaction.on_commit(lambda: enqueue(job.id, digest, uploaded_by))
+    return job
+
+def run_ingest_job(job_id, content_hash='', uploaded_by=None):
+    _queued.discard(job_id)
+    job = IngestJob.objects.get(pk=job_id)
+    job.status = IngestJob.RUNNING
+    job.save(update_fields=['status', 'updated_at'])
+    
+    # Ingestion runs in one transaction, so progress goes through the shared
+    # jobs cache where pollers can see it before the dataset is committed.
+    # The entry also shows the job is alive; it lapses JOB_STALE_SECONDS
+    # after the last chunk.
+    def progress(rows_processed):
+        progress_cache().set(progress_key(job_id), rows_processed, settings.JOB_STALE_SECONDS)
+        heartbeat(_queued.copy())
+    
+    progress(0)
+    path = spool_path(job_id)
+    try:
+        with open(path, 'rb') as f:
+            dataset = process_csv_data(File(f).chunks(), job.filename, progress=progress,
+                                       content_hash=content_hash, uploaded_by=uploaded_by)
+    except ValueError as e:
+        fail_job(job, str(e))
+        return
+    except Exception as e:
+        fail_job(job, f'Error processing file: {str(e)}')
+        raise
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    job.dataset = dataset
+    job.rows_processed = dataset.total_count
+    job.status = IngestJob.SUCCEEDED
+    job.save()
+
+def fail_job(job, error):
+    job.status = IngestJob.FAILED
+    job.rows_processed = progress_cache().get(progress_key(job.id), 0)
+    job.error = error
+    job.save()
+
+def is_stale(job, now=None):
+    if job.status not in (IngestJob.PENDING, IngestJob.RUNNING):
+        return False
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    return job.updated_at < cutoff and progress_cache().get(progress_key(job.id)) is None
+
+def fail_if_stale(job, now=None):
+    """Fail ``job`` if no worker is running it any more and remove its
+    spool file; returns whether it was stale."""
+    if not is_stale(job, now):
+        return False
+    fail_job(job, LOST_JOB_ERROR)
+    spool_path(job.id).unlink(missing_ok=True)
+    return True
+
+def fail_stale_jobs(now=None):
+    unfinished = IngestJob.objects.filter(status__in=[IngestJob.PENDING, IngestJob.RUNNING])
+    return [job.id for job in unfinished if fail_if_stale(job, now)]
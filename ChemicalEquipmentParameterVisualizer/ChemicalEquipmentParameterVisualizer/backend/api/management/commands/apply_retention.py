@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.retention import apply_retention, expired_datasets
+
+
+class Command(BaseCommand):
+    help = 'Delete datasets that no retention rule keeps (see RETENTION_* settings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List the datasets that would be deleted')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            expired = list(expired_datasets().values_list('id', 'name'))
+            for dataset_id, name in expired:
+                self.stdout.write(f'{dataset_id}\t{name}')
+            self.stdout.write(f'{len(expired)} dataset(s) would be deleted')
+            return
+
+        deleted = apply_retention()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {len(deleted)} dataset(s)'))
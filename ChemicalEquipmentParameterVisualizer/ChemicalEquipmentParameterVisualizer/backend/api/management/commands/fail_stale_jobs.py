@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Fail ingestion jobs no worker is running any more and remove their spool files (see JOB_STALE_SECONDS)'
+
+    def handle(self, *args, **options):
+        failed = fail_stale_jobs()
+        self.stdout.write(self.style.SUCCESS(f'Failed {len(failed)} stale job(s)'))
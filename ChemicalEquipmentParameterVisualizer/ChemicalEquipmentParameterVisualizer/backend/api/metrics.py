@@ -0,0 +1,106 @@
+"""In-process counters, histograms and timing spans, rendered in the
+Prometheus text format by ``/api/metrics/``.
+
+Values are per process: with several server workers each one reports its
+own, and Prometheus sums them across scrape targets.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+PREFIX = 'equipment'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+# (name, labels) -> [per-bucket counts (last is +Inf), sum, count]
+_histograms = {}
+_buckets = {}
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+def increment(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] += value
+
+def get_counter(name, **labels):
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+def counters():
+    with _lock:
+        return {name + format_labels(labels): value for (name, labels), value in _counters.items()}
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = _key(name, labels)
+    index = bisect_left(buckets, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            _buckets.setdefault(name, buckets)
+            histogram = _histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+@contextmanager
+def span(name, **labels):
+    """Record the duration of the block in the ``span_duration_seconds``
+    histogram; ``_sum`` per span shows where request time goes."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('span_duration_seconds', time.perf_counter() - started, span=name, **labels)
+
+def timed(iterable, name, **labels):
+    """Iterate ``iterable``, timing each step as a ``name`` span."""
+    iterator = iter(iterable)
+    while True:
+        with span(name, **labels):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def render_prometheus():
+    with _lock:
+        counter_items = sorted(_counters.items())
+        histogram_items = sorted((key, (list(counts), total, count))
+                                 for key, (counts, total, count) in _histograms.items())
+        buckets = dict(_buckets)
+
+    lines = []
+    declared = None
+    for (name, labels), value in counter_items:
+        metric = f'{PREFIX}_{name}_total'
+        if name != declared:
+            lines.append(f'# TYPE {metric} counter')
+            declared = name
+        lines.append(f'{metric}{format_labels(labels)} {value}')
+
+    for (name, labels), (counts, total, count) in histogram_items:
+        metric = f'{PREFIX}_{name}'
+        if name != declared:
+            lines.append(f'# TYPE {metric} histogram')
+            declared = name
+        cumulative = 0
+        for bound, bucket_count in zip((*buckets[name], '+Inf'), counts):
+            cumulative += bucket_count
+            lines.append(f'{metric}_bucket{format_labels((*labels, ("le", str(bound))))} {cumulative}')
+        lines.append(f'{metric}_sum{format_labels(labels)} {total}')
+        lines.append(f'{metric}_count{format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
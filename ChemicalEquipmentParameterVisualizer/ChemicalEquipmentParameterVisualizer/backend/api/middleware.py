@@ -0,0 +1,183 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+logger = logging.getLogger('api.metrics')
+
+# Quality 11 (the default) is several times slower for a few percent gain
+BROTLI_QUALITY = 5
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that uses Brotli instead when the client accepts it and
+    the brotli package is installed. Streaming responses always use gzip."""
+
+    def process_response(self, request, response):
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is None or response.streaming or not accepts_brotli:
+            return super().process_response(request, response)
+
+        if len(response.content) < 200 or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+class QueryCounter:
+    """connection.execute_wrapper that counts queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware that can run in an async middleware chain, so
+    async views under ASGI are not pushed onto a thread per request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+class MetricsMiddleware:
+    """Records latency, status and bytes in/out of every request by view.
+    A METRICS_SAMPLE_RATE fraction of requests also counts DB queries and,
+    with METRICS_LOG_REQUESTS, is logged as one JSON line. Under ASGI the
+    queries of async views run on other threads and are not counted."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sampled = random.random() < settings.METRICS_SAMPLE_RATE
+        started = time.perf_counter()
+        if sampled:
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        else:
+            queries = None
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, sampled, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        sampled = random.random() < settings.METRICS_SAMPLE_RATE
+        self.record(request, response, time.perf_counter() - started, sampled)
+        return response
+
+    def record(self, request, response, elapsed, sampled, queries=None):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        status = f'{response.status_code // 100}xx'
+        bytes_in = int(request.META.get('CONTENT_LENGTH') or 0)
+        metrics.increment('http_requests', view=view, method=request.method, status=status)
+        metrics.observe('http_request_duration_seconds', elapsed, view=view, method=request.method)
+        metrics.increment('http_request_bytes', bytes_in, view=view)
+        bytes_out = self.count_bytes_out(response, view)
+
+        if queries is not None:
+            metrics.observe('db_queries_per_request', queries.count, metrics.COUNT_BUCKETS, view=view)
+            metrics.observe('db_query_duration_seconds', queries.seconds, view=view)
+        if sampled and settings.METRICS_LOG_REQUESTS:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'db_queries': queries.count if queries else None,
+                'db_ms': round(queries.seconds * 1000, 2) if queries else None,
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+            }))
+
+    def count_bytes_out(self, response, view):
+        if response.has_header('Content-Length'):
+            size = int(response['Content-Length'])
+        elif not response.streaming:
+            size = len(response.content)
+        else:
+            # Counted as the stream is consumed; unknown when logged
+            counted = self.acounted if response.is_async else self.counted
+            response.streaming_content = counted(response.streaming_content, view)
+            return None
+        metrics.increment('http_response_bytes', size, view=view)
+        return size
+
+    def counted(self, content, view):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            metrics.increment('http_response_bytes', size, view=view)
+
+    async def acounted(self, content, view):
+        size = 0
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            metrics.increment('http_response_bytes', size, view=view)
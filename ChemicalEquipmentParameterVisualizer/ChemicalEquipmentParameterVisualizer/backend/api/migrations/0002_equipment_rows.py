@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:57
+
+import csv
+import io
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMN_FIELDS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'equipment_type',
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+NUMERIC_FIELDS = ['flowrate', 'pressure', 'temperature']
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def split_csv_into_rows(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    EquipmentRow = apps.get_model('api', 'EquipmentRow')
+    for dataset in Dataset.objects.iterator():
+        rows = []
+        for record in csv.DictReader(io.StringIO(dataset.csv_file.strip())):
+            values = {field: record.get(col) or '' for col, field in COLUMN_FIELDS.items()}
+            for field in NUMERIC_FIELDS:
+                values[field] = to_float(values[field])
+            rows.append(EquipmentRow(dataset=dataset, **values))
+        EquipmentRow.objects.bulk_create(rows, batch_size=5000)
+
+
+def join_rows_into_csv(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.iterator():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(COLUMN_FIELDS)
+        for values in dataset.rows.order_by('id').values_list(*COLUMN_FIELDS.values()):
+            writer.writerow(['' if value is None else value for value in values])
+        dataset.csv_file = buffer.getvalue()
+        dataset.save(update_fields=['csv_file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_name', models.CharField(max_length=255)),
+                ('equipment_type', models.CharField(max_length=100)),
+                ('flowrate', models.FloatField(null=True)),
+                ('pressure', models.FloatField(null=True)),
+                ('temperature', models.FloatField(null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='api.dataset')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['dataset', 'equipment_type'], name='api_equipme_dataset_de4bd9_idx')],
+            },
+        ),
+        migrations.RunPython(split_csv_into_rows, join_rows_into_csv),
+        # A default lets the column be re-added when the migration is reversed
+        migrations.AlterField(
+            model_name='dataset',
+            name='csv_file',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='csv_file',
+        ),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:59
+
+import json
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of api.stats.compute_statistics as of this migration, so
+# later changes to the live module cannot change what the backfill stores.
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+PERCENTILES = [5, 50, 95, 99]
+DEFAULT_HISTOGRAM_BINS = 10
+
+
+def compute_statistics(frame, bins=DEFAULT_HISTOGRAM_BINS):
+    values = frame[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    return {
+        'parameters': describe(values),
+        'by_type': describe_by_type(frame),
+        'histograms': histograms(values, bins),
+        'correlation': correlation(frame),
+        'histogram_bins': bins,
+    }
+
+
+def describe(values):
+    counts = (~np.isnan(values)).sum(axis=0)
+    if len(values):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            rows = {
+                'mean': np.nanmean(values, axis=0),
+                'std': np.nanstd(values, axis=0, ddof=1),
+                'min': np.nanmin(values, axis=0),
+                'max': np.nanmax(values, axis=0),
+                **dict(zip((f'p{p}' for p in PERCENTILES), np.nanpercentile(values, PERCENTILES, axis=0))),
+            }
+    else:
+        rows = dict.fromkeys(['mean', 'std', 'min', 'max'] + [f'p{p}' for p in PERCENTILES],
+                             np.full(len(NUMERIC_COLUMNS), np.nan))
+
+    return {
+        col: {'count': int(counts[index]), **{name: number(row[index]) for name, row in rows.items()}}
+        for index, col in enumerate(NUMERIC_COLUMNS)
+    }
+
+
+def describe_by_type(frame):
+    grouped = frame.groupby('Type', observed=True)[NUMERIC_COLUMNS].agg(['count', 'mean', 'std', 'min', 'max'])
+    result = {}
+    for eq_type, row in grouped.iterrows():
+        result[str(eq_type)] = {
+            col: {
+                'count': int(row[(col, 'count')]),
+                'mean': number(row[(col, 'mean')]),
+                'std': number(row[(col, 'std')]),
+                'min': number(row[(col, 'min')]),
+                'max': number(row[(col, 'max')]),
+            }
+            for col in NUMERIC_COLUMNS
+        }
+    return result
+
+
+def histograms(values, bins):
+    result = {}
+    for index, col in enumerate(NUMERIC_COLUMNS):
+        column = values[:, index]
+        column = column[~np.isnan(column)]
+        if not len(column):
+            result[col] = {'edges': [], 'counts': []}
+            continue
+        counts, edges = np.histogram(column, bins=bins)
+        result[col] = {'edges': [float(edge) for edge in edges], 'counts': [int(count) for count in counts]}
+    return result
+
+
+def correlation(frame):
+    matrix = frame[NUMERIC_COLUMNS].corr()
+    return {row: {col: number(matrix.at[row, col]) for col in NUMERIC_COLUMNS} for row in NUMERIC_COLUMNS}
+
+
+def number(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def backfill_statistics(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.iterator():
+        frame = pd.DataFrame.from_records(
+            dataset.rows.values_list('flowrate', 'pressure', 'temperature', 'equipment_type'),
+            columns=['Flowrate', 'Pressure', 'Temperature', 'Type'],
+        )
+        frame[['Flowrate', 'Pressure', 'Temperature']] = frame[['Flowrate', 'Pressure', 'Temperature']].astype(float)
+        bins = getattr(settings, 'STATS_HISTOGRAM_BINS', DEFAULT_HISTOGRAM_BINS)
+        dataset.statistics = json.dumps(compute_statistics(frame, bins))
+        dataset.save(update_fields=['statistics'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_equipment_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='statistics',
+            field=models.TextField(default='{}'),
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
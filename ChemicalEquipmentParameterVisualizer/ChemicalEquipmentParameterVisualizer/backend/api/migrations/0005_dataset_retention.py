@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_uploaded_at(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    Dataset.objects.update(updated_at=models.F('uploaded_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_ingest_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='pinned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_uploaded_at, migrations.RunPython.noop),
+    ]
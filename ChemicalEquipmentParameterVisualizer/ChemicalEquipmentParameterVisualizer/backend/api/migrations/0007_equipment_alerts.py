@@ -0,0 +1,126 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:17
+
+import math
+
+import django.db.models.deletion
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of api.anomalies.detect_anomalies as of this migration, so
+# later changes to the live rules cannot change what the backfill stores.
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+ANOMALY_COLUMNS = ['position', 'parameter', 'rule', 'value', 'low', 'high']
+DEFAULT_RULES = {'limits': {}, 'zscore': 3.0, 'iqr': 0}
+
+
+def empty_anomalies():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in zip(
+        ANOMALY_COLUMNS, ['int64', 'object', 'object', 'float64', 'float64', 'float64'])})
+
+
+def limit_bounds(types, limits, column):
+    default = limits.get('*', {}).get(column, [None, None])
+    per_category = [limits.get(eq_type, {}).get(column, default) for eq_type in types.cat.categories] + [default]
+    low, high = np.array(per_category, dtype=np.float64).reshape(-1, 2).T
+    codes = types.cat.codes.to_numpy()
+    return low[codes], high[codes]
+
+
+def grouped(frame, column, how, *args):
+    return frame.groupby('Type', observed=True)[column].transform(how, *args).to_numpy(dtype=np.float64)
+
+
+def rule_bounds(frame, rules, column):
+    limits = rules.get('limits') or {}
+    if limits:
+        yield ('limit', *limit_bounds(frame['Type'].astype('category'), limits, column))
+
+    z = rules.get('zscore') or 0
+    if z:
+        mean, std = grouped(frame, column, 'mean'), grouped(frame, column, 'std')
+        yield 'zscore', mean - z * std, mean + z * std
+
+    k = rules.get('iqr') or 0
+    if k:
+        q1, q3 = grouped(frame, column, 'quantile', 0.25), grouped(frame, column, 'quantile', 0.75)
+        yield 'iqr', q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+
+
+def detect_anomalies(frame, rules):
+    if not len(frame):
+        return empty_anomalies()
+
+    found = []
+    for column in NUMERIC_COLUMNS:
+        values = frame[column].to_numpy(dtype=np.float64)
+        for rule, low, high in rule_bounds(frame, rules, column):
+            positions = np.flatnonzero((values < low) | (values > high))
+            if len(positions):
+                found.append(pd.DataFrame({
+                    'position': positions,
+                    'parameter': column,
+                    'rule': rule,
+                    'value': values[positions],
+                    'low': low[positions],
+                    'high': high[positions],
+                }))
+    if not found:
+        return empty_anomalies()
+    return pd.concat(found, ignore_index=True).sort_values(['position', 'parameter', 'rule'], ignore_index=True)
+
+
+def backfill_alerts(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    EquipmentAlert = apps.get_model('api', 'EquipmentAlert')
+    for dataset in Dataset.objects.iterator():
+        frame = pd.DataFrame.from_records(
+            dataset.rows.order_by('id').values_list('id', 'flowrate', 'pressure', 'temperature', 'equipment_type'),
+            columns=['id', 'Flowrate', 'Pressure', 'Temperature', 'Type'],
+        )
+        frame[['Flowrate', 'Pressure', 'Temperature']] = frame[['Flowrate', 'Pressure', 'Temperature']].astype(float)
+        frame['Type'] = frame['Type'].astype('category')
+        anomalies = detect_anomalies(frame, getattr(settings, 'ANOMALY_RULES', DEFAULT_RULES))
+        row_ids = frame['id'].to_numpy()
+        EquipmentAlert.objects.bulk_create([
+            EquipmentAlert(dataset=dataset, row_id=int(row_ids[position]), parameter=parameter, rule=rule,
+                           value=value, low=None if math.isnan(low) else low, high=None if math.isnan(high) else high)
+            for position, parameter, rule, value, low, high in anomalies.itertuples(index=False)
+        ], batch_size=5000)
+        dataset.flagged_count = int(anomalies['position'].nunique())
+        dataset.save(update_fields=['flagged_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_dataset_uploaded_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='flagged_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='EquipmentAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parameter', models.CharField(max_length=20)),
+                ('rule', models.CharField(choices=[('limit', 'Type limit'), ('zscore', 'Z-score outlier'), ('iqr', 'IQR outlier')], max_length=10)),
+                ('value', models.FloatField()),
+                ('low', models.FloatField(null=True)),
+                ('high', models.FloatField(null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='api.dataset')),
+                ('row', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='alerts', to='api.equipmentrow')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['dataset', 'rule', 'parameter'], name='api_equipme_dataset_228798_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_alerts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_upload_dedup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='parse_report',
+            field=models.TextField(default='{}'),
+        ),
+    ]
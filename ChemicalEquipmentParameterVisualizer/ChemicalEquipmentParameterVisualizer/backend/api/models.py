@@ -1,19 +1,46 @@
 from django.db import models
 from django.contrib.auth.models import User
 import json
+import uuid
+
+# CSV column name -> EquipmentRow field
+COLUMN_FIELDS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'equipment_type',
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+# Alerts API column -> EquipmentAlert lookup
+ALERT_FIELDS = {
+    'Equipment Name': 'row__equipment_name',
+    'Type': 'row__equipment_type',
+    'Parameter': 'parameter',
+    'Rule': 'rule',
+    'Value': 'value',
+    'Low': 'low',
+    'High': 'high',
+}
 
 class Dataset(models.Model):
     name = models.CharField(max_length=255)
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-    csv_file = models.TextField()
+    pinned = models.BooleanField(default=False)
+    # SHA-256 of the uploaded bytes; blank for datasets uploaded before dedup
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
     
     total_count = models.IntegerField(default=0)
     avg_flowrate = models.FloatField(default=0.0)
     avg_pressure = models.FloatField(default=0.0)
     avg_temperature = models.FloatField(default=0.0)
+    flagged_count = models.IntegerField(default=0)
     
     equipment_type_distribution = models.TextField(default='{}')
+    statistics = models.TextField(default='{}')
+    parse_report = models.TextField(default='{}')
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -26,3 +53,102 @@ class Dataset(models.Model):
     
     def set_type_distribution(self, distribution_dict):
         self.equipment_type_distribution = json.dumps(distribution_dict)
+    
+    def get_statistics(self):
+        return json.loads(self.statistics)
+    
+    def set_statistics(self, statistics_dict):
+        self.statistics = json.dumps(statistics_dict)
+    
+    def get_parse_report(self):
+        return json.loads(self.parse_report)
+    
+    def set_parse_report(self, report_dict):
+        self.parse_report = json.dumps(report_dict)
+    
+    def iter_rows(self, columns=None):
+        columns = columns or list(COLUMN_FIELDS)
+        fields = [COLUMN_FIELDS[col] for col in columns]
+        for values in self.rows.values_list(*fields).iterator(chunk_size=2000):
+            yield dict(zip(columns, values))
+    
+    def row_columns(self, columns=None):
+        columns = columns or list(COLUMN_FIELDS)
+        fields = [COLUMN_FIELDS[col] for col in columns]
+        data = {col: [] for col in columns}
+        appends = [data[col].append for col in columns]
+        for values in self.rows.values_list(*fields).iterator(chunk_size=2000):
+            for append, value in zip(appends, values):
+                append(value)
+        return data
+
+class EquipmentRow(models.Model):
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='rows')
+    equipment_name = models.CharField(max_length=255)
+    equipment_type = models.CharField(max_length=100)
+    flowrate = models.FloatField(null=True)
+    pressure = models.FloatField(null=True)
+    temperature = models.FloatField(null=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['dataset', 'equipment_type'])]
+    
+    def __str__(self):
+        return self.equipment_name
+
+class EquipmentAlert(models.Model):
+    LIMIT = 'limit'
+    ZSCORE = 'zscore'
+    IQR = 'iqr'
+    RULE_CHOICES = [
+        (LIMIT, 'Type limit'),
+        (ZSCORE, 'Z-score outlier'),
+        (IQR, 'IQR outlier'),
+    ]
+    
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='alerts')
+    # Alerts go with their dataset; DO_NOTHING keeps row deletes a single
+    # bulk DELETE instead of Django collecting every row first
+    row = models.ForeignKey(EquipmentRow, on_delete=models.DO_NOTHING, related_name='alerts')
+    parameter = models.CharField(max_length=20)
+    rule = models.CharField(max_length=10, choices=RULE_CHOICES)
+    value = models.FloatField()
+    low = models.FloatField(null=True)
+    high = models.FloatField(null=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['dataset', 'rule', 'parameter'])]
+    
+    def __str__(self):
+        return f"{self.parameter} {self.rule} ({self.value})"
+
+class IngestJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    rows_processed = models.IntegerField(default=0)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True)
+    # Set when the upload matched an existing dataset and was not ingested
+    duplicate = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+class RowPagination(LimitOffsetPagination):
+    default_limit = 100
+    max_limit = 5000
+
+class DatasetPagination(CursorPagination):
+    # Keyset pagination: a page is one indexed range scan however deep it is
+    ordering = ('-uploaded_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,404 @@
+import codecs
+import csv
+import io
+import re
+from collections import deque
+from itertools import chain, islice
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype, union_categoricals
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+DEFAULT_CHUNK_ROWS = 50000
+DEFAULT_MAX_ROW_ERRORS = 100
+CSV_ENGINES = ('auto', 'c', 'pyarrow')
+
+# Encoding and delimiter are detected from the start of the file
+SAMPLE_BYTES = 1 << 16
+FALLBACK_ENCODINGS = ('cp1252', 'latin-1')
+DELIMITERS = ',;\t|'
+
+# Non-numeric columns are declared up front; numeric ones go through the
+# parser's float fast path and only fall back to coerce_numeric() in chunks
+# where a value does not parse
+TEXT_DTYPES = {'Equipment Name': 'object', 'Type': 'category'}
+ARROW_BLOCK_BYTES_PER_ROW = 64
+
+# A leading number, optionally followed by a unit: "5.2 bar", "110°C", "95 m3/h"
+NUMBER_WITH_UNIT = r'^([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*(?:[^\d\s.+-].*)?$'
+# With a decimal comma, a dot before a group of three digits separates thousands
+THOUSANDS_DOT = r'(?<=\d)\.(?=\d{3}(?:\D|$))'
+# Bytes of the stream the C engine's field counter looks at per step
+COUNT_BLOCK_BYTES = 1 << 20
+
+
+class UnusableCSV(ValueError):
+    """A CSV that parsed but leaves nothing to store, such as one without
+    data rows or with no number in a numeric column."""
+
+    def __init__(self, message, parse_report=None):
+        super().__init__(message)
+        self.parse_report = parse_report
+
+
+def error_body(error):
+    """Response body for a ValueError raised while ingesting a CSV."""
+    body = {'error': str(error)}
+    if isinstance(error, UnusableCSV):
+        body['parse_report'] = error.parse_report
+    return body
+
+
+class ChunkedStream(io.RawIOBase):
+    """Read-only file object over an iterable of byte chunks, such as
+    ``UploadedFile.chunks()``, so pandas can parse without a full copy."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self.bytes_read += size
+        return size
+
+
+class FieldCounter:
+    """Passes byte chunks through unchanged while counting the fields of
+    every record the way the C parser splits them, and remembers the records
+    whose field count is not ``expected``. The C parser pads short lines and
+    cuts long ones without a word once it is told to read only some columns,
+    so this is how those lines are found.
+
+    Quoted fields (which may hold delimiters and line breaks) are collapsed
+    with a regex before counting; lines holding only blanks are skipped like
+    the parser skips them. ``take(rows)`` hands out the bad records among the
+    first ``rows`` records the parser returned.
+    """
+
+    def __init__(self, chunks, expected, delimiter, encoding):
+        self.chunks = chunks
+        self.expected = expected
+        self.delimiter = ord(delimiter)
+        self.blanks = b' \t\r'.replace(delimiter.encode(), b'')
+        separators = re.escape(delimiter.encode())
+        self.quoted = re.compile(rb'(?:(?<=[%s\r\n])|\A)"[^"]*(?:""[^"]*)*"' % separators)
+        self.open_quote = re.compile(rb'(?:(?<=[%s\r\n])|\A)"' % separators)
+        # Counting works on ASCII-compatible bytes
+        self.decoder = codecs.getincrementaldecoder(encoding)() if encoding.startswith('utf-16') else None
+        self.tail = b''
+        self.records = 0
+        self.blank_lines = 0
+        self.bad = deque()
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            data = self.decoder.decode(chunk).encode() if self.decoder else chunk
+            for start in range(0, len(data), COUNT_BLOCK_BYTES):
+                self.feed(data[start:start + COUNT_BLOCK_BYTES])
+            yield chunk
+        # Before the parser sees the end of the stream
+        self.feed(self.decoder.decode(b'', final=True).encode() if self.decoder else b'', final=True)
+
+    def take(self, rows):
+        bad = []
+        while self.bad and self.bad[0][0] < rows:
+            bad.append(self.bad.popleft())
+        return bad
+
+    def feed(self, data, final=False):
+        body = self.tail + data
+        self.tail = b''
+        if not final:
+            # A trailing CR may be the first half of a CRLF
+            cut = max(body.rfind(b'\n'), body.rfind(b'\r', 0, len(body) - 1)) + 1
+            body, self.tail = body[:cut], body[cut:]
+        if b'"' in body:
+            # Only the field count matters, so each quoted field becomes one byte
+            body = self.quoted.sub(b'q', body)
+            unclosed = self.open_quote.search(body)
+            if unclosed and not final:
+                start = max(body.rfind(b'\n', 0, unclosed.start()), body.rfind(b'\r', 0, unclosed.start())) + 1
+                body, self.tail = body[:start], body[start:] + self.tail
+        if body:
+            self.count(body, final)
+
+    def count(self, body, final):
+        data = np.frombuffer(body, dtype=np.uint8)
+        ends = data == 10
+        if b'\r' in body and body.count(b'\r') != body.count(b'\r\n'):
+            # Lone CRs end lines too
+            ends[:-1] |= (data[:-1] == 13) & (data[1:] != 10)
+            ends[-1] |= data[-1] == 13
+        ends = np.flatnonzero(ends)
+        if final and (not len(ends) or ends[-1] != len(data) - 1):
+            ends = np.append(ends, len(data))
+        delimiters = np.searchsorted(np.flatnonzero(data == self.delimiter), ends)
+        fields = np.diff(delimiters, prepend=0) + 1
+        starts = np.concatenate([[0], ends[:-1] + 1])
+        # Blank lines have one field, so they are among the mismatches; the
+        # header, record 0, always has the expected count
+        for index in np.flatnonzero(fields != self.expected).tolist():
+            record = self.records + index
+            if not body[starts[index]:ends[index]].strip(self.blanks):
+                self.blank_lines += 1
+                continue
+            # (row among those the parser returns, line, fields)
+            self.bad.append((record - 1 - self.blank_lines, record + 1, int(fields[index])))
+        self.records += len(ends)
+
+
+class ParseReport:
+    """Problems found while parsing: every one is counted, the first
+    ``max_errors`` are kept. Rows are numbered from 1 after the header."""
+
+    def __init__(self, max_errors=DEFAULT_MAX_ROW_ERRORS):
+        self.max_errors = max_errors
+        self.error_count = 0
+        self.errors = []
+        self.encoding = None
+        self.delimiter = None
+        self.engine = None
+
+    def add(self, count, errors):
+        self.error_count += count
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend(islice(errors, room))
+
+    def as_dict(self):
+        return {
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'engine': self.engine,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def as_chunks(csv_source):
+    if isinstance(csv_source, str):
+        return [csv_source.encode('utf-8')]
+    if isinstance(csv_source, bytes):
+        return [csv_source]
+    if hasattr(csv_source, 'chunks'):
+        return csv_source.chunks()
+    return csv_source
+
+
+def peek(chunks, size):
+    """Return at least ``size`` leading bytes of ``chunks`` (fewer if the
+    stream is shorter) and an iterator over the whole stream."""
+    chunks = iter(chunks)
+    head = []
+    length = 0
+    for chunk in chunks:
+        head.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+    sample = b''.join(head)
+    return sample, chain([sample], chunks)
+
+
+def detect_encoding(sample):
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    for encoding in ('utf-8',) + FALLBACK_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+
+
+def read_header(sample, encoding):
+    """Return the stripped header names and the delimiter that yields all
+    required columns, falling back to a comma."""
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample)
+    for delimiter in DELIMITERS:
+        header = [name.strip() for name in next(csv.reader(io.StringIO(text), delimiter=delimiter), [])]
+        if all(col in header for col in REQUIRED_COLUMNS):
+            return header, delimiter
+    return [name.strip() for name in next(csv.reader(io.StringIO(text)), [])], ','
+
+
+def iter_csv_chunks(csv_source, chunk_rows=DEFAULT_CHUNK_ROWS, report=None, engine='auto'):
+    """Yield DataFrames of up to about ``chunk_rows`` rows holding the
+    required columns, with float64 numeric columns and a categorical Type.
+
+    Values that are not numbers, even after stripping a unit, become NaN and
+    malformed lines are skipped; both are recorded in ``report``.
+    """
+    report = report if report is not None else ParseReport()
+    sample, chunks = peek(as_chunks(csv_source), SAMPLE_BYTES)
+    if not sample.strip():
+        raise ValueError('CSV file is empty')
+
+    encoding = detect_encoding(sample)
+    header, delimiter = read_header(sample, encoding)
+    validate_columns(header)
+    if len(set(header)) != len(header):
+        raise ValueError('CSV header contains duplicate column names')
+
+    report.encoding = encoding
+    report.delimiter = delimiter
+    report.engine = 'pyarrow' if engine in ('auto', 'pyarrow') and pa is not None else 'c'
+    if report.engine == 'pyarrow':
+        frames = read_arrow_chunks(io.BufferedReader(ChunkedStream(chunks)), header, encoding, delimiter,
+                                   chunk_rows, report)
+    else:
+        counter = FieldCounter(chunks, len(header), delimiter, encoding)
+        frames = read_pandas_chunks(io.BufferedReader(ChunkedStream(counter)), header, encoding, delimiter,
+                                    chunk_rows, report, counter)
+
+    offset = 0
+    for chunk in frames:
+        coerce_numeric(chunk, offset, delimiter != ',', report)
+        offset += len(chunk)
+        yield chunk
+
+
+def read_pandas_chunks(stream, header, encoding, delimiter, chunk_rows, report, counter):
+    # index_col=False: a long first row must not turn the first column into
+    # the index. Lines with the wrong number of fields come from ``counter``
+    reader = pd.read_csv(stream, sep=delimiter, header=0, names=header, usecols=REQUIRED_COLUMNS, index_col=False,
+                         dtype=TEXT_DTYPES, chunksize=chunk_rows, encoding=encoding, encoding_errors='replace')
+    rows = 0
+    with reader:
+        for chunk in reader:
+            first, rows = rows, rows + len(chunk)
+            bad = counter.take(rows)
+            if bad:
+                report.add(len(bad), ({'line': line, 'error': f'expected {len(header)} fields, saw {fields}'}
+                                      for _, line, fields in bad))
+                keep = np.ones(len(chunk), dtype=bool)
+                keep[[row - first for row, _, _ in bad]] = False
+                chunk = chunk[keep].reset_index(drop=True)
+            yield chunk[REQUIRED_COLUMNS]
+
+
+def read_arrow_chunks(stream, header, encoding, delimiter, chunk_rows, report):
+    def invalid_row(row):
+        error = f'expected {row.expected_columns} fields, saw {row.actual_columns}'
+        report.add(1, [{'line': row.number, 'error': error}])
+        return 'skip'
+
+    # Numeric columns are read as strings and cast per batch, so one bad
+    # value falls back to coerce_numeric() instead of failing the stream
+    column_types = {'Equipment Name': pa.string(), 'Type': pa.dictionary(pa.int32(), pa.string()),
+                    **dict.fromkeys(NUMERIC_COLUMNS, pa.string())}
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(skip_rows=1, column_names=header,
+                                        block_size=chunk_rows * ARROW_BLOCK_BYTES_PER_ROW,
+                                        encoding='utf8' if encoding in ('utf-8', 'utf-8-sig') else encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter, invalid_row_handler=invalid_row),
+        convert_options=pa_csv.ConvertOptions(include_columns=REQUIRED_COLUMNS, column_types=column_types,
+                                              strings_can_be_null=True),
+    )
+    for batch in reader:
+        columns = []
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name in NUMERIC_COLUMNS:
+                try:
+                    column = column.cast(pa.float64())
+                except pa.ArrowInvalid:
+                    pass
+            columns.append(column)
+        yield pa.RecordBatch.from_arrays(columns, names=batch.schema.names).to_pandas()
+
+
+def coerce_numeric(chunk, offset, decimal_comma, report):
+    for col in NUMERIC_COLUMNS:
+        values = chunk[col]
+        if is_float_dtype(values) or is_integer_dtype(values):
+            chunk[col] = values.astype(np.float64)
+            continue
+
+        text = values.astype(object).str.strip()
+        if decimal_comma:
+            # 1.234,5: drop the thousands separators before the decimal comma
+            text = text.str.replace(THOUSANDS_DOT, '', regex=True).str.replace(',', '.', regex=False)
+        numbers = pd.to_numeric(text.str.extract(NUMBER_WITH_UNIT, expand=False), errors='coerce')
+        chunk[col] = numbers.astype(np.float64)
+
+        bad = np.flatnonzero((numbers.isna() & text.notna() & (text != '')).to_numpy())
+        report.add(len(bad), ({'row': offset + int(position) + 1, 'column': col, 'value': values.iloc[position],
+                               'error': f'{col} is not a number'} for position in bad))
+
+
+def validate_columns(columns):
+    if not all(col in columns for col in REQUIRED_COLUMNS):
+        raise ValueError(f"CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}")
+
+
+class StreamingSummary:
+    """Accumulates count, means and the type distribution chunk by chunk.
+
+    The numeric columns and a categorical Type column are also kept (about
+    25 bytes per row) so exact percentiles can be computed once at the end.
+    """
+
+    def __init__(self):
+        self.total_count = 0
+        self._sums = dict.fromkeys(NUMERIC_COLUMNS, 0.0)
+        self._counts = dict.fromkeys(NUMERIC_COLUMNS, 0)
+        self._types = {}
+        self._values = []
+        self._type_values = []
+
+    def update(self, chunk):
+        self.total_count += len(chunk)
+        self._values.append(chunk[NUMERIC_COLUMNS].to_numpy(dtype=np.float64))
+        types = chunk['Type']
+        if not isinstance(types.dtype, pd.CategoricalDtype):
+            types = types.astype(str).where(types.notna()).astype('category')
+        self._type_values.append(types)
+        for col in NUMERIC_COLUMNS:
+            values = chunk[col]
+            self._sums[col] += float(values.sum())
+            self._counts[col] += int(values.count())
+        for eq_type, count in types.value_counts().items():
+            if count:
+                self._types[eq_type] = self._types.get(eq_type, 0) + int(count)
+
+    def mean(self, column):
+        if not self._counts[column]:
+            return float('nan')
+        return self._sums[column] / self._counts[column]
+
+    @property
+    def type_distribution(self):
+        return dict(sorted(self._types.items(), key=lambda item: item[1], reverse=True))
+
+    def frame(self):
+        if not self._values:
+            frame = pd.DataFrame(np.empty((0, len(NUMERIC_COLUMNS))), columns=NUMERIC_COLUMNS)
+            frame['Type'] = pd.Categorical([])
+            return frame
+        frame = pd.DataFrame(np.concatenate(self._values), columns=NUMERIC_COLUMNS)
+        frame['Type'] = union_categoricals(self._type_values)
+        return frame
@@ -0,0 +1,104 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Response keys holding a table of equipment rows; columnar renderers expect
+# them as {column: [values]} instead of a list of row objects
+TABLE_KEYS = ('results', 'csv_data')
+
+def is_columnar(request):
+    return getattr(getattr(request, 'accepted_renderer', None), 'columnar', False)
+
+def table_payload(columns, rows, columnar):
+    if not columnar:
+        return [dict(zip(columns, row)) for row in rows]
+    values = list(zip(*rows)) or [()] * len(columns)
+    return {col: list(column) for col, column in zip(columns, values)}
+
+def encode_default(obj):
+    return JSONEncoder().default(obj)
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.equipment.columnar+json'
+    format = 'columnar'
+    columnar = True
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+class ArrowRenderer(BaseRenderer):
+    """Arrow IPC stream of the row table; the remaining response fields are
+    stored as JSON under the ``response`` schema metadata key."""
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        table = pa.table({})
+        if isinstance(data, dict):
+            data = dict(data)
+            for key in TABLE_KEYS:
+                if isinstance(data.get(key), dict):
+                    table = pa.table(data.pop(key))
+                    break
+        table = table.replace_schema_metadata({'response': json.dumps(data, cls=JSONEncoder)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+class ExportRenderer(BaseRenderer):
+    """Selects an export format during content negotiation. The export view
+    streams the body itself, so only error responses are rendered here."""
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+class ParquetExportRenderer(ExportRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+
+EXPORT_RENDERERS = [CSVExportRenderer, NDJSONExportRenderer, ParquetExportRenderer]
+
+WIRE_RENDERERS = [ColumnarJSONRenderer]
+if msgpack is not None:
+    WIRE_RENDERERS.append(MessagePackRenderer)
+if pa is not None:
+    WIRE_RENDERERS.append(ArrowRenderer)
+
+DATASET_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + WIRE_RENDERERS
@@ -0,0 +1,264 @@
+import io
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Coalesce, Greatest
+
+from . import metrics
+from .models import Dataset
+from .tasks import submit
+
+# Bump whenever the report layout changes so stale cached PDFs are not served
+REPORT_VERSION = 4
+
+REPORT_MODES = ('full', 'summary', 'outliers', 'alerts')
+DEFAULT_TOP_N = 50
+MAX_TOP_N = 1000
+
+# The equipment table is split into one Table per page, which keeps
+# ReportLab's layout and page splitting linear in the number of rows.
+# SimpleDocTemplate's frame pads the page body by this much top and bottom
+FRAME_PADDING = 6
+
+def report_options(params):
+    mode = params.get('mode', 'full')
+    if mode not in REPORT_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(REPORT_MODES)}")
+    try:
+        top_n = int(params.get('top', DEFAULT_TOP_N))
+    except ValueError:
+        raise ValueError('top must be an integer')
+    return mode, min(max(top_n, 1), MAX_TOP_N)
+
+def report_path(dataset, mode='full', top_n=DEFAULT_TOP_N):
+    # uploaded_at keeps files from a recreated database from being mistaken for ours
+    stamp = int(dataset.uploaded_at.timestamp() * 1e6)
+    variant = f'{mode}{top_n}' if mode == 'outliers' else mode
+    return Path(settings.REPORT_CACHE_DIR) / f'dataset-{dataset.id}-{stamp}-{variant}-v{REPORT_VERSION}.pdf'
+
+def cached_report(dataset, mode='full', top_n=DEFAULT_TOP_N):
+    """The cached report opened for reading, or None. Opening is the lookup,
+    so a file removed by retention or a dataset change is just a miss."""
+    try:
+        report = open(report_path(dataset, mode, top_n), 'rb')
+    except FileNotFoundError:
+        return None
+    metrics.increment('report_cache_hits')
+    return report
+
+def get_report(dataset, mode='full', top_n=DEFAULT_TOP_N):
+    """The report as an open binary file, rendered and cached on a miss."""
+    report = cached_report(dataset, mode, top_n)
+    if report is not None:
+        return report
+    metrics.increment('report_cache_misses')
+    return io.BytesIO(render_report(dataset, mode, top_n))
+
+def render_report(dataset, mode='full', top_n=DEFAULT_TOP_N):
+    path = report_path(dataset, mode, top_n)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+    with metrics.span('pdf_render', mode=mode):
+        content = generate_pdf_report(dataset, mode, top_n).getvalue()
+    metrics.increment('pdf_bytes', len(content), mode=mode)
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    return content
+
+def prerender_report(dataset_id):
+    dataset = Dataset.objects.filter(pk=dataset_id).first()
+    if dataset is not None:
+        get_report(dataset).close()
+
+def schedule_report(dataset_id):
+    if settings.REPORT_PRERENDER:
+        transaction.on_commit(lambda: submit(prerender_report, dataset_id))
+
+def delete_reports(dataset_id):
+    for path in Path(settings.REPORT_CACHE_DIR).glob(f'dataset-{dataset_id}-*'):
+        path.unlink(missing_ok=True)
+
+def generate_pdf_report(dataset, mode='full', top_n=DEFAULT_TOP_N):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.units import inch
+    import io
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    title = Paragraph(f"<b>Equipment Data Report: {dataset.name}</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    uploaded_date = Paragraph(f"<b>Uploaded:</b> {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
+    elements.append(uploaded_date)
+    elements.append(Spacer(1, 0.2*inch))
+    
+    summary_title = Paragraph("<b>Summary Statistics</b>", styles['Heading2'])
+    elements.append(summary_title)
+    elements.append(Spacer(1, 0.1*inch))
+    
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Equipment Count', str(dataset.total_count)],
+        ['Average Flowrate', f"{dataset.avg_flowrate:.2f}"],
+        ['Average Pressure', f"{dataset.avg_pressure:.2f}"],
+        ['Average Temperature', f"{dataset.avg_temperature:.2f}"],
+        ['Flagged Equipment', str(dataset.flagged_count)]
+    ]
+    
+    summary_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(summary_style)
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    type_dist_title = Paragraph("<b>Equipment Type Distribution</b>", styles['Heading2'])
+    elements.append(type_dist_title)
+    elements.append(Spacer(1, 0.1*inch))
+    
+    type_dist = dataset.get_type_distribution()
+    type_data = [['Equipment Type', 'Count']]
+    for eq_type, count in type_dist.items():
+        type_data.append([eq_type, str(count)])
+    
+    type_table = Table(type_data, colWidths=[3*inch, 2*inch])
+    type_table.setStyle(summary_style)
+    elements.append(type_table)
+    
+    if mode == 'summary':
+        doc.build(elements)
+        buffer.seek(0)
+        return buffer
+    
+    header = ['Name', 'Type', 'Flowrate', 'Pressure', 'Temp']
+    col_widths = [1.5*inch, 1.3*inch, 1*inch, 1*inch, 0.8*inch]
+    
+    if mode == 'outliers':
+        section_title = f"<b>Top {top_n} Outliers</b>"
+        note = 'Rows ranked by their largest absolute z-score across Flowrate, Pressure and Temperature.'
+        header.append('|z|')
+        col_widths.append(0.6*inch)
+        rows = format_rows(outlier_rows(dataset, top_n))
+    elif mode == 'alerts':
+        section_title = "<b>Flagged Equipment</b>"
+        max_rows = settings.REPORT_MAX_ROWS
+        alert_count = dataset.alerts.count()
+        note = 'One line per parameter and rule that flagged the equipment at upload.'
+        if alert_count > max_rows:
+            note += f' Showing the first {max_rows:,} of {alert_count:,} alerts; use the alerts API for the rest.'
+        header = ['Name', 'Type', 'Parameter', 'Rule', 'Value', 'Allowed range']
+        col_widths = [1.4*inch, 1.1*inch, 0.9*inch, 0.7*inch, 0.8*inch, 1.4*inch]
+        rows = alert_rows(dataset, max_rows)
+    else:
+        section_title = "<b>Equipment Details</b>"
+        max_rows = settings.REPORT_MAX_ROWS
+        note = None
+        if dataset.total_count > max_rows:
+            note = (f'Showing the first {max_rows:,} of {dataset.total_count:,} rows. '
+                    'Use the outliers report mode or the rows API for the rest.')
+        rows = format_rows(dataset.rows.values_list('equipment_name', 'equipment_type', 'flowrate', 'pressure',
+                                                    'temperature')[:max_rows].iterator(chunk_size=2000))
+    
+    heading = [Paragraph(section_title, styles['Heading2'])]
+    if note:
+        heading.append(Paragraph(note, styles['Normal']))
+    heading.append(Spacer(1, 0.1*inch))
+    elements.append(PageBreak())
+    elements.extend(heading)
+    
+    # Whole-table style ranges only: cost stays per table, not per cell
+    equipment_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    # Tables as tall as the frame, so none is split across pages; the first
+    # starts a page under the section heading
+    header_height, row_height = 0.4*inch, 0.22*inch
+    frame_height = doc.height - 2 * FRAME_PADDING
+    heading_height = sum(flowable.wrap(doc.width, frame_height)[1] + flowable.getSpaceBefore()
+                         + flowable.getSpaceAfter() for flowable in heading)
+    page_rows = int((frame_height - header_height) // row_height)
+    first_rows = max(int((frame_height - heading_height - header_height) // row_height), 1)
+    row_heights = [header_height] + [row_height] * page_rows
+    
+    for chunk in chunked(rows, page_rows, first_rows):
+        table = Table([header] + chunk, colWidths=col_widths, rowHeights=row_heights[:len(chunk) + 1], repeatRows=1)
+        table.setStyle(equipment_style)
+        elements.append(table)
+    
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+def outlier_rows(dataset, top_n):
+    stats = dataset.get_statistics().get('parameters', {})
+    scores = []
+    for field, column in (('flowrate', 'Flowrate'), ('pressure', 'Pressure'), ('temperature', 'Temperature')):
+        mean = stats.get(column, {}).get('mean')
+        std = stats.get(column, {}).get('std')
+        if mean is None or not std:
+            continue
+        scores.append(Coalesce(Abs((F(field) - mean) / std), Value(0.0), output_field=FloatField()))
+    if not scores:
+        return []
+    score = Greatest(*scores) if len(scores) > 1 else scores[0]
+    return (dataset.rows.annotate(score=score).order_by('-score', 'id')
+            .values_list('equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature', 'score')[:top_n])
+
+def alert_rows(dataset, max_rows):
+    alerts = dataset.alerts.values_list('row__equipment_name', 'row__equipment_type', 'parameter', 'rule',
+                                        'value', 'low', 'high')[:max_rows]
+    for name, eq_type, parameter, rule, value, low, high in alerts.iterator(chunk_size=2000):
+        yield [name, eq_type, parameter, rule, format_value(value), format_range(low, high)]
+
+def format_range(low, high):
+    if low is None:
+        return f'<= {high:g}'
+    if high is None:
+        return f'>= {low:g}'
+    return f'{low:g} to {high:g}'
+
+def format_rows(rows):
+    for name, eq_type, *values in rows:
+        yield [name, eq_type] + [format_value(value) for value in values]
+
+def chunked(items, size, first_size=None):
+    chunk = []
+    limit = first_size or size
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == limit:
+            yield chunk
+            chunk = []
+            limit = size
+    if chunk:
+        yield chunk
+
+def format_value(value):
+    return '' if value is None else f'{value:g}'
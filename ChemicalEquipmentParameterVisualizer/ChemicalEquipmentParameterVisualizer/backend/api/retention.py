@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .cache import invalidate_dataset
+from .models import Dataset
+from .reports import delete_reports
+
+# A dataset survives if any rule keeps it: pinned, among the newest
+# RETENTION_KEEP_LAST, younger than RETENTION_MAX_AGE_DAYS, or among its
+# uploader's newest RETENTION_KEEP_PER_USER. Rules set to 0 are disabled and
+# with every rule disabled nothing is deleted.
+
+NEWEST_FIRST = [F('uploaded_at').desc(), F('id').desc()]
+
+def keep_condition(now=None):
+    keep_last = settings.RETENTION_KEEP_LAST
+    max_age_days = settings.RETENTION_MAX_AGE_DAYS
+    keep_per_user = settings.RETENTION_KEEP_PER_USER
+    if not (keep_last or max_age_days or keep_per_user):
+        return None
+
+    keep = Q(pinned=True)
+    if keep_last:
+        newest = Dataset.objects.order_by(*NEWEST_FIRST).values('id')[:keep_last]
+        keep |= Q(id__in=newest)
+    if max_age_days:
+        keep |= Q(uploaded_at__gte=(now or timezone.now()) - timedelta(days=max_age_days))
+    if keep_per_user:
+        ranked = Dataset.objects.annotate(
+            rank=Window(RowNumber(), partition_by=[F('uploaded_by')], order_by=NEWEST_FIRST),
+        )
+        keep |= Q(id__in=ranked.filter(rank__lte=keep_per_user).values('id'))
+    return keep
+
+def expired_datasets(now=None):
+    keep = keep_condition(now)
+    if keep is None:
+        return Dataset.objects.none()
+    return Dataset.objects.exclude(keep)
+
+def apply_retention(now=None):
+    """Delete every dataset no retention rule keeps; returns their ids."""
+    with transaction.atomic():
+        expired_ids = list(expired_datasets(now).values_list('id', flat=True))
+        if expired_ids:
+            Dataset.objects.filter(id__in=expired_ids).delete()
+
+    for dataset_id in expired_ids:
+        invalidate_dataset(dataset_id)
+        delete_reports(dataset_id)
+    return expired_ids
+
+def apply_retention_after_upload():
+    if settings.RETENTION_INLINE:
+        apply_retention()
@@ -1,32 +1,72 @@
 from rest_framework import serializers
-from .models import Dataset
+from . import metrics
+from .jobs import get_progress
+from .models import Dataset, IngestJob
+from .renderers import is_columnar
 
-class DatasetSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        serializer = getattr(self, 'child', self)
+        with metrics.span('serialize', serializer=type(serializer).__name__):
+            return super().data
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+class DatasetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     type_distribution = serializers.SerializerMethodField()
+    parse_report = serializers.SerializerMethodField()
     
     class Meta:
         model = Dataset
-        fields = ['id', 'name', 'uploaded_at', 'total_count', 'avg_flowrate', 
-                  'avg_pressure', 'avg_temperature', 'type_distribution']
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'name', 'uploaded_at', 'pinned', 'total_count', 'avg_flowrate', 
+                  'avg_pressure', 'avg_temperature', 'flagged_count', 'type_distribution', 'parse_report']
     
     def get_type_distribution(self, obj):
         return obj.get_type_distribution()
+    
+    def get_parse_report(self, obj):
+        return obj.get_parse_report()
+
+class DatasetListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Only plain columns, so the list query can skip the JSON text columns
+    class Meta:
+        model = Dataset
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'name', 'uploaded_at', 'pinned', 'total_count', 'avg_flowrate',
+                  'avg_pressure', 'avg_temperature', 'flagged_count']
 
-class DatasetDetailSerializer(serializers.ModelSerializer):
+class DatasetDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     type_distribution = serializers.SerializerMethodField()
+    parse_report = serializers.SerializerMethodField()
     csv_data = serializers.SerializerMethodField()
     
     class Meta:
         model = Dataset
-        fields = ['id', 'name', 'uploaded_at', 'total_count', 'avg_flowrate', 
-                  'avg_pressure', 'avg_temperature', 'type_distribution', 'csv_data']
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'name', 'uploaded_at', 'pinned', 'total_count', 'avg_flowrate', 
+                  'avg_pressure', 'avg_temperature', 'flagged_count', 'type_distribution', 'parse_report', 'csv_data']
     
     def get_type_distribution(self, obj):
         return obj.get_type_distribution()
     
+    def get_parse_report(self, obj):
+        return obj.get_parse_report()
+    
     def get_csv_data(self, obj):
-        import io
-        import csv
-        lines = obj.csv_file.strip().split('\n')
-        reader = csv.DictReader(lines)
-        return list(reader)
+        if is_columnar(self.context.get('request')):
+            return obj.row_columns()
+        return list(obj.iter_rows())
+
+class IngestJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    rows_processed = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = IngestJob
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'filename', 'status', 'rows_processed', 'dataset', 'duplicate', 'error', 'created_at', 'updated_at']
+    
+    def get_rows_processed(self, obj):
+        return get_progress(obj)
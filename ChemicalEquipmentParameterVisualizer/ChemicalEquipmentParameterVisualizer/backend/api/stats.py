@@ -0,0 +1,122 @@
+import math
+import warnings
+
+import numpy as np
+
+from .parsing import NUMERIC_COLUMNS
+
+PERCENTILES = [5, 50, 95, 99]
+DEFAULT_HISTOGRAM_BINS = 10
+
+
+def compute_statistics(frame, bins=DEFAULT_HISTOGRAM_BINS):
+    """Distribution statistics for the numeric parameters of ``frame``.
+
+    ``frame`` holds the NUMERIC_COLUMNS as floats and a Type column. Missing
+    values are ignored, standard deviations use ddof=1 like pandas, and
+    percentiles use linear interpolation. NaN results become None so the
+    output is valid JSON.
+    """
+    values = frame[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    return {
+        'parameters': describe(values),
+        'by_type': describe_by_type(frame),
+        'histograms': histograms(values, bins),
+        'correlation': correlation(frame),
+        'histogram_bins': bins,
+        'box_plots': box_plots_by_type(frame),
+    }
+
+
+def describe(values):
+    counts = (~np.isnan(values)).sum(axis=0)
+    if len(values):
+        with warnings.catch_warnings():
+            # All-missing columns yield NaN, reported as None
+            warnings.simplefilter('ignore', RuntimeWarning)
+            rows = {
+                'mean': np.nanmean(values, axis=0),
+                'std': np.nanstd(values, axis=0, ddof=1),
+                'min': np.nanmin(values, axis=0),
+                'max': np.nanmax(values, axis=0),
+                **dict(zip((f'p{p}' for p in PERCENTILES), np.nanpercentile(values, PERCENTILES, axis=0))),
+            }
+    else:
+        rows = dict.fromkeys(['mean', 'std', 'min', 'max'] + [f'p{p}' for p in PERCENTILES],
+                             np.full(len(NUMERIC_COLUMNS), np.nan))
+
+    return {
+        col: {'count': int(counts[index]), **{name: number(row[index]) for name, row in rows.items()}}
+        for index, col in enumerate(NUMERIC_COLUMNS)
+    }
+
+
+def describe_by_type(frame):
+    grouped = frame.groupby('Type', observed=True)[NUMERIC_COLUMNS].agg(['count', 'mean', 'std', 'min', 'max'])
+    result = {}
+    for eq_type, row in grouped.iterrows():
+        result[str(eq_type)] = {
+            col: {
+                'count': int(row[(col, 'count')]),
+                'mean': number(row[(col, 'mean')]),
+                'std': number(row[(col, 'std')]),
+                'min': number(row[(col, 'min')]),
+                'max': number(row[(col, 'max')]),
+            }
+            for col in NUMERIC_COLUMNS
+        }
+    return result
+
+
+def histograms(values, bins):
+    result = {}
+    for index, col in enumerate(NUMERIC_COLUMNS):
+        column = values[:, index]
+        column = column[~np.isnan(column)]
+        if not len(column):
+            result[col] = {'edges': [], 'counts': []}
+            continue
+        counts, edges = np.histogram(column, bins=bins)
+        result[col] = {'edges': [float(edge) for edge in edges], 'counts': [int(count) for count in counts]}
+    return result
+
+
+def box_plot(values):
+    """Quartiles and Tukey whiskers (the most extreme values within 1.5 IQR
+    of the box) of a 1-D array with missing values removed."""
+    if not len(values):
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        'count': int(len(values)),
+        'min': float(values.min()),
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'max': float(values.max()),
+        'whisker_low': float(inside.min()),
+        'whisker_high': float(inside.max()),
+        'outliers': int(len(values) - len(inside)),
+    }
+
+
+def box_plots_by_type(frame):
+    result = {}
+    for eq_type, group in frame.groupby('Type', observed=True):
+        result[str(eq_type)] = {}
+        for col in NUMERIC_COLUMNS:
+            values = group[col].to_numpy(dtype=np.float64)
+            result[str(eq_type)][col] = box_plot(values[~np.isnan(values)])
+    return result
+
+
+def correlation(frame):
+    matrix = frame[NUMERIC_COLUMNS].corr()
+    return {row: {col: number(matrix.at[row, col]) for col in NUMERIC_COLUMNS} for row in NUMERIC_COLUMNS}
+
+
+def number(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
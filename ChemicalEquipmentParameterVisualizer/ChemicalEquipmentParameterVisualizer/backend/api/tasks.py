@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_process_pool = None
+_offload_executor = None
+_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS,
+                                           thread_name_prefix='api-background')
+    return _executor
+
+def get_process_pool():
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            # Spawn rather than fork: the server process already runs threads
+            _process_pool = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+def get_offload_executor():
+    global _offload_executor
+    with _lock:
+        if _offload_executor is None:
+            _offload_executor = ThreadPoolExecutor(max_workers=settings.OFFLOAD_WORKERS,
+                                                   thread_name_prefix='api-offload')
+    return _offload_executor
+
+async def offload(fn, *args, **kwargs):
+    """Run ``fn`` in the bounded offload pool and await its result; async
+    views use it for parsing and rendering so the event loop stays free."""
+    return await asyncio.wrap_future(get_offload_executor().submit(_run_offloaded, fn, args, kwargs))
+
+def submit(fn, *args, **kwargs):
+    return get_executor().submit(_run, fn, args, kwargs)
+
+def _run(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', fn.__name__)
+        raise
+    finally:
+        # Worker threads keep their own connections; release them between tasks
+        connections.close_all()
+
+def _run_offloaded(fn, args, kwargs):
+    # Treated like a request: connections older than CONN_MAX_AGE are dropped
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
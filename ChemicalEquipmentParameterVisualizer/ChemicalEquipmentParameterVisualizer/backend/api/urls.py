@@ -1,11 +1,27 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DatasetViewSet, upload_csv
+from . import async_views
+from .views import DatasetViewSet, IngestJobViewSet, cache_stats, prometheus_metrics, upload_batch, upload_csv
 
 router = DefaultRouter()
 router.register(r'datasets', DatasetViewSet)
+router.register(r'jobs', IngestJobViewSet)
 
 urlpatterns = [
     path('upload/', upload_csv, name='upload_csv'),
+    path('upload/batch/', upload_batch, name='upload_batch'),
+    path('cache/stats/', cache_stats, name='cache_stats'),
+    path('metrics/', prometheus_metrics, name='metrics'),
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Matched ahead of the routes they replace; names are kept for reverse()
+    urlpatterns[:0] = [
+        path('upload/', async_views.upload_csv, name='upload_csv'),
+        path('datasets/', async_views.dataset_list, name='dataset-list'),
+        path('datasets/<int:pk>/', async_views.dataset_detail, name='dataset-detail'),
+        path('datasets/<int:pk>/summary/', async_views.dataset_summary_view, name='dataset-summary'),
+        path('datasets/<int:pk>/generate_pdf/', async_views.generate_pdf, name='dataset-generate-pdf'),
+    ]
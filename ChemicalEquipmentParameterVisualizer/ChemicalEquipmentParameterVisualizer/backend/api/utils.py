@@ -1,143 +1,76 @@
-import pandas as pd
-import io
-from .models import Dataset
+import math
 
-def process_csv_data(csv_content, filename):
-    df = pd.read_csv(io.StringIO(csv_content))
-    
-    required_columns = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"CSV must contain columns: {', '.join(required_columns)}")
-    
-    total_count = len(df)
-    avg_flowrate = df['Flowrate'].mean()
-    avg_pressure = df['Pressure'].mean()
-    avg_temperature = df['Temperature'].mean()
-    
-    type_distribution = df['Type'].value_counts().to_dict()
-    
-    dataset = Dataset.objects.create(
-        name=filename,
-        csv_file=csv_content,
-        total_count=total_count,
-        avg_flowrate=round(avg_flowrate, 2),
-        avg_pressure=round(avg_pressure, 2),
-        avg_temperature=round(avg_temperature, 2)
-    )
-    dataset.set_type_distribution(type_distribution)
-    dataset.save()
-    
-    cleanup_old_datasets()
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from . import metrics
+from .cache import invalidate_dataset_list
+from .models import Dataset, EquipmentAlert, EquipmentRow
+from .parsing import NUMERIC_COLUMNS, ParseReport, StreamingSummary, iter_csv_chunks
+from .reports import schedule_report
+from .retention import apply_retention_after_upload
+from .workers import summarize
+
+ROW_INSERT_BATCH = 5000
+
+def process_csv_data(csv_source, filename, progress=None, content_hash='', uploaded_by=None):
+    summary = StreamingSummary()
+    report = ParseReport(settings.CSV_MAX_ROW_ERRORS)
+    row_ids = []
+    
+    with transaction.atomic():
+        dataset = Dataset.objects.create(name=filename, content_hash=content_hash, uploaded_by=uploaded_by)
+        chunks = iter_csv_chunks(csv_source, settings.CSV_CHUNK_ROWS, report, settings.CSV_ENGINE)
+        for chunk in metrics.timed(chunks, 'csv_parse'):
+            summary.update(chunk)
+            with metrics.span('db_write'):
+                row_ids.append(insert_rows(dataset, chunk))
+            if progress is not None:
+                progress(summary.total_count)
+        
+        with metrics.span('aggregate'):
+            result = summarize(summary, settings.STATS_HISTOGRAM_BINS, settings.ANOMALY_RULES, report)
+        with metrics.span('db_write'):
+            apply_summary(dataset, result)
+            dataset.save()
+            create_alerts(dataset, result['anomalies'], np.concatenate(row_ids) if row_ids else np.empty(0, np.int64))
+    metrics.increment('rows_ingested', summary.total_count)
+    metrics.increment('row_parse_errors', report.error_count)
+    
+    invalidate_dataset_list()
+    schedule_report(dataset.id)
+    apply_retention_after_upload()
     
     return dataset
 
-def cleanup_old_datasets():
-    datasets = Dataset.objects.all().order_by('-uploaded_at')
-    if datasets.count() > 5:
-        old_datasets = datasets[5:]
-        for ds in old_datasets:
-            ds.delete()
+def apply_summary(dataset, summary):
+    dataset.total_count = summary['total_count']
+    dataset.avg_flowrate = summary['averages']['Flowrate']
+    dataset.avg_pressure = summary['averages']['Pressure']
+    dataset.avg_temperature = summary['averages']['Temperature']
+    dataset.set_type_distribution(summary['type_distribution'])
+    dataset.set_statistics(summary['statistics'])
+    dataset.flagged_count = int(summary['anomalies']['position'].nunique())
+    dataset.set_parse_report(summary['parse_report'])
 
-def generate_pdf_report(dataset):
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    import io
-    
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    title = Paragraph(f"<b>Equipment Data Report: {dataset.name}</b>", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    uploaded_date = Paragraph(f"<b>Uploaded:</b> {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
-    elements.append(uploaded_date)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    summary_title = Paragraph("<b>Summary Statistics</b>", styles['Heading2'])
-    elements.append(summary_title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Total Equipment Count', str(dataset.total_count)],
-        ['Average Flowrate', f"{dataset.avg_flowrate:.2f}"],
-        ['Average Pressure', f"{dataset.avg_pressure:.2f}"],
-        ['Average Temperature', f"{dataset.avg_temperature:.2f}"]
+def insert_rows(dataset, chunk):
+    """Insert ``chunk`` and return the new row ids in chunk order."""
+    rows = EquipmentRow.objects.bulk_create(rows_from_chunk(dataset, chunk), batch_size=ROW_INSERT_BATCH)
+    return np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+
+def create_alerts(dataset, anomalies, row_ids):
+    EquipmentAlert.objects.bulk_create([
+        EquipmentAlert(dataset=dataset, row_id=int(row_ids[position]), parameter=parameter, rule=rule,
+                       value=value, low=None if math.isnan(low) else low, high=None if math.isnan(high) else high)
+        for position, parameter, rule, value, low, high in anomalies.itertuples(index=False)
+    ], batch_size=ROW_INSERT_BATCH)
+
+def rows_from_chunk(dataset, chunk):
+    names = chunk['Equipment Name'].fillna('').astype(str)
+    types = chunk['Type'].astype(object).fillna('').astype(str)
+    numeric = [chunk[col].astype(object).where(chunk[col].notna(), None) for col in NUMERIC_COLUMNS]
+    return [
+        EquipmentRow(dataset=dataset, equipment_name=name, equipment_type=eq_type,
+                     flowrate=flowrate, pressure=pressure, temperature=temperature)
+        for name, eq_type, flowrate, pressure, temperature in zip(names, types, *numeric)
     ]
-    
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    type_dist_title = Paragraph("<b>Equipment Type Distribution</b>", styles['Heading2'])
-    elements.append(type_dist_title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    type_dist = dataset.get_type_distribution()
-    type_data = [['Equipment Type', 'Count']]
-    for eq_type, count in type_dist.items():
-        type_data.append([eq_type, str(count)])
-    
-    type_table = Table(type_data, colWidths=[3*inch, 2*inch])
-    type_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(type_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    equipment_title = Paragraph("<b>Equipment Details</b>", styles['Heading2'])
-    elements.append(equipment_title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    import csv
-    lines = dataset.csv_file.strip().split('\n')
-    reader = csv.DictReader(lines)
-    equipment_data = [['Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
-    for row in reader:
-        equipment_data.append([
-            row['Equipment Name'],
-            row['Type'],
-            row['Flowrate'],
-            row['Pressure'],
-            row['Temperature']
-        ])
-    
-    equipment_table = Table(equipment_data, colWidths=[1.5*inch, 1.3*inch, 1*inch, 1*inch, 0.8*inch])
-    equipment_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(equipment_table)
-    
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
@@ -1,42 +1,245 @@
-from rest_framework import viewsets, status
+import json
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import api_view, action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from django.http import HttpResponse
-from .models import Dataset
-from .serializers import DatasetSerializer, DatasetDetailSerializer
-from .utils import process_csv_data, generate_pdf_report
+from rest_framework.reverse import reverse
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET
+from . import metrics
+from .batch import process_batch
+from .cache import (cache_stats as get_cache_stats, get_or_build, invalidate_dataset, make_etag, not_modified,
+                    set_validators, variant_key)
+from .charts import build_chart_data, chart_options
+from .compare import compare_datasets
+from .dedup import content_hash, find_duplicate
+from .exports import EXPORTERS
+from .filters import TRUE_VALUES, filter_alerts, filter_datasets, filter_rows, has_row_filters, order_rows, parse_columns
+from .jobs import fail_if_stale, start_ingest_job
+from .models import ALERT_FIELDS, COLUMN_FIELDS, Dataset, EquipmentRow, IngestJob
+from .pagination import DatasetPagination, RowPagination
+from .parsing import error_body
+from .renderers import DATASET_RENDERERS, EXPORT_RENDERERS, is_columnar, pa, table_payload
+from .reports import get_report, report_options
+from .serializers import DatasetSerializer, DatasetDetailSerializer, DatasetListSerializer, IngestJobSerializer
+from .utils import process_csv_data
+
+def dataset_list_queryset(params):
+    # The list never reads the statistics, parse report or type distribution
+    # text columns
+    return filter_datasets(Dataset.objects.only(*DatasetListSerializer.Meta.fields), params)
+
+def paginate_datasets(request, queryset):
+    paginator = DatasetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(DatasetListSerializer(page, many=True).data).data
+
+def dataset_summary(dataset):
+    return {
+        'id': dataset.id,
+        'name': dataset.name,
+        'uploaded_at': dataset.uploaded_at,
+        'total_count': dataset.total_count,
+        'avg_flowrate': dataset.avg_flowrate,
+        'avg_pressure': dataset.avg_pressure,
+        'avg_temperature': dataset.avg_temperature,
+        'type_distribution': dataset.get_type_distribution(),
+        'statistics': dataset.get_statistics()
+    }
+
+def request_uploader(request):
+    """The user an upload through ``request`` (a DRF request) is recorded
+    for; anonymous uploads have none."""
+    return request.user if request.user.is_authenticated else None
+
+def ingest_upload(csv_file, uploaded_by=None):
+    """Return the stored duplicate of ``csv_file`` or ingest it, as a
+    (payload, status) pair."""
+    try:
+        digest = content_hash(csv_file)
+        existing = find_duplicate(digest)
+        if existing is not None:
+            return {**DatasetSerializer(existing).data, 'duplicate': True}, status.HTTP_200_OK
+        
+        dataset = process_csv_data(csv_file, csv_file.name, content_hash=digest, uploaded_by=uploaded_by)
+        
+        serializer = DatasetSerializer(dataset)
+        return {**serializer.data, 'duplicate': False}, status.HTTP_201_CREATED
+    
+    except ValueError as e:
+        return error_body(e), status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        return {'error': f'Error processing file: {str(e)}'}, status.HTTP_500_INTERNAL_SERVER_ERROR
 
 class DatasetViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Dataset.objects.all()
     serializer_class = DatasetSerializer
+    renderer_classes = DATASET_RENDERERS
+    
+    def get_queryset(self):
+        if self.action == 'list':
+            return dataset_list_queryset(self.request.query_params)
+        return super().get_queryset()
     
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        include_rows = self.request.query_params.get('include_rows', '').lower() in TRUE_VALUES
+        if self.action == 'retrieve' and include_rows:
             return DatasetDetailSerializer
         return DatasetSerializer
     
+    def response_variant(self):
+        return variant_key(self.action, self.request.query_params, is_columnar(self.request))
+    
+    def cached_response(self, dataset_id, last_modified, fingerprint, build):
+        # Only pinning changes a dataset after upload, so (id, updated_at)
+        # identifies a detail representation; list responses use a fingerprint
+        # of the table.
+        variant = self.response_variant()
+        etag = make_etag(fingerprint, variant, self.request.accepted_renderer.format)
+        response = not_modified(self.request, etag, last_modified)
+        if response is None:
+            response = Response(get_or_build(dataset_id, f'{fingerprint}:{variant}', build))
+        return set_validators(response, etag, last_modified)
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_queryset()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        state = queryset.aggregate(count=Count('id'), max_id=Max('id'), last_modified=Max('updated_at'))
+        if state['last_modified'] is None:
+            return Response(paginate_datasets(request, queryset))
+        fingerprint = f"{state['count']}-{state['max_id']}-{state['last_modified'].timestamp()}"
+        return self.cached_response(None, state['last_modified'], fingerprint,
+                                    lambda: paginate_datasets(request, queryset))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_detail_response(lambda: super(DatasetViewSet, self).retrieve(request, *args, **kwargs).data)
+    
+    def cached_detail_response(self, build):
+        pk = self.kwargs['pk']
+        updated_at = get_object_or_404(Dataset.objects.values_list('updated_at', flat=True), pk=pk)
+        return self.cached_response(pk, updated_at, f'{pk}-{updated_at.timestamp()}', build)
+    
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        baseline = request.query_params.get('baseline')
+        if baseline and not baseline.isdigit():
+            return Response({'error': 'baseline must be a dataset id'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = compare_datasets(request.query_params, int(baseline) if baseline else None)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if result is None:
+            return Response({'error': 'No datasets match'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+    
     @action(detail=True, methods=['get'])
     def summary(self, request, pk=None):
+        return self.cached_detail_response(self.build_summary)
+    
+    def build_summary(self):
+        return dataset_summary(self.get_object())
+    
+    @action(detail=True, methods=['post', 'delete'])
+    def pin(self, request, pk=None):
         dataset = self.get_object()
-        return Response({
-            'id': dataset.id,
-            'name': dataset.name,
-            'uploaded_at': dataset.uploaded_at,
-            'total_count': dataset.total_count,
-            'avg_flowrate': dataset.avg_flowrate,
-            'avg_pressure': dataset.avg_pressure,
-            'avg_temperature': dataset.avg_temperature,
-            'type_distribution': dataset.get_type_distribution()
-        })
+        dataset.pinned = request.method == 'POST'
+        dataset.save(update_fields=['pinned', 'updated_at'])
+        invalidate_dataset(dataset.id)
+        return Response(DatasetSerializer(dataset).data)
     
     @action(detail=True, methods=['get'])
-    def generate_pdf(self, request, pk=None):
+    def rows(self, request, pk=None):
+        dataset = self.get_object()
+        try:
+            columns = parse_columns(request.query_params)
+            queryset = order_rows(filter_rows(dataset.rows.all(), request.query_params), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Rows never change after upload, so a page is identified by the
+        # dataset version and the query; pages are too varied to be worth
+        # keeping in the response cache
+        etag = make_etag(f'{dataset.id}-{dataset.updated_at.timestamp()}', self.response_variant(),
+                         request.accepted_renderer.format)
+        response = not_modified(request, etag, dataset.updated_at)
+        if response is None:
+            paginator = RowPagination()
+            page = paginator.paginate_queryset(
+                queryset.values_list(*[COLUMN_FIELDS[col] for col in columns]), request, view=self)
+            response = paginator.get_paginated_response(table_payload(columns, page, is_columnar(request)))
+        return set_validators(response, etag, dataset.updated_at)
+    
+    @action(detail=True, methods=['get'])
+    def alerts(self, request, pk=None):
+        dataset = self.get_object()
+        try:
+            queryset = filter_alerts(dataset.alerts.all(), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        columns = list(ALERT_FIELDS)
+        paginator = RowPagination()
+        page = paginator.paginate_queryset(
+            queryset.order_by('row_id', 'id').values_list(*ALERT_FIELDS.values()), request, view=self)
+        return paginator.get_paginated_response(table_payload(columns, page, is_columnar(request)))
+    
+    @action(detail=True, methods=['get'], url_path='chart-data')
+    def chart_data(self, request, pk=None):
+        try:
+            options = chart_options(request.query_params)
+            queryset = filter_rows(EquipmentRow.objects.filter(dataset_id=pk), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def build():
+            statistics = None
+            if not has_row_filters(request.query_params):
+                statistics = json.loads(Dataset.objects.values_list('statistics', flat=True).get(pk=pk))
+            return build_chart_data(queryset, statistics=statistics, **options)
+        return self.cached_detail_response(build)
+    
+    @action(detail=True, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request, pk=None):
         dataset = self.get_object()
-        pdf_buffer = generate_pdf_report(dataset)
+        renderer = request.accepted_renderer
+        if renderer.format == 'parquet' and pa is None:
+            return Response({'error': 'Parquet export requires pyarrow'}, status=status.HTTP_400_BAD_REQUEST,
+                            content_type='application/json')
+        try:
+            columns = parse_columns(request.query_params)
+            queryset = order_rows(filter_rows(dataset.rows.all(), request.query_params), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST, content_type='application/json')
         
-        response = HttpResponse(pdf_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{dataset.name}_report.pdf"'
+        response = StreamingHttpResponse(EXPORTERS[renderer.format](queryset, columns),
+                                         content_type=renderer.media_type)
+        stem = dataset.name.rsplit('.', 1)[0]
+        response['Content-Disposition'] = content_disposition_header(True, f'{stem}.{renderer.format}')
         return response
+    
+    @action(detail=True, methods=['get'])
+    def generate_pdf(self, request, pk=None):
+        dataset = self.get_object()
+        try:
+            mode, top_n = report_options(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return FileResponse(get_report(dataset, mode, top_n), content_type='application/pdf', as_attachment=True,
+                            filename=f'{dataset.name}_report.pdf')
+
+class IngestJobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = IngestJob.objects.all()
+    serializer_class = IngestJobSerializer
+    
+    def get_object(self):
+        job = super().get_object()
+        fail_if_stale(job)
+        return job
 
 @api_view(['POST'])
 def upload_csv(request):
@@ -48,14 +251,38 @@ def upload_csv(request):
     if not csv_file.name.endswith('.csv'):
         return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        csv_content = csv_file.read().decode('utf-8')
-        dataset = process_csv_data(csv_content, csv_file.name)
-        
-        serializer = DatasetDetailSerializer(dataset)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    if request.query_params.get('async', '').lower() in TRUE_VALUES:
+        job = start_ingest_job(csv_file, request_uploader(request))
+        serializer = IngestJobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': reverse('ingestjob-detail', args=[job.id], request=request)})
     
+    payload, status_code = ingest_upload(csv_file, request_uploader(request))
+    return Response(payload, status=status_code)
+
+@api_view(['POST'])
+def upload_batch(request):
+    files = request.FILES.getlist('files') + request.FILES.getlist('file')
+    if not files:
+        return Response({'error': 'No files provided'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        result = process_batch(files, request_uploader(request))
     except ValueError as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        return Response({'error': f'Error processing file: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'error': f'Error processing files: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if result['created']:
+        return Response(result, status=status.HTTP_201_CREATED)
+    if result['duplicates']:
+        return Response(result, status=status.HTTP_200_OK)
+    return Response(result, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def cache_stats(request):
+    return Response(get_cache_stats())
+
+@require_GET
+def prometheus_metrics(request):
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
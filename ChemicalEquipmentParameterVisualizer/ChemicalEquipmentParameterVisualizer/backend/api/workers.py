@@ -0,0 +1,56 @@
+"""Parsing entry points run in the batch upload process pool.
+
+Nothing here imports Django, so spawned workers start quickly and never touch
+the database; the parent process does all the writes.
+"""
+import math
+import time
+
+import pandas as pd
+
+from .anomalies import detect_anomalies
+from .parsing import (DEFAULT_MAX_ROW_ERRORS, NUMERIC_COLUMNS, REQUIRED_COLUMNS, ParseReport, StreamingSummary,
+                      UnusableCSV, iter_csv_chunks)
+from .stats import DEFAULT_HISTOGRAM_BINS, compute_statistics
+
+
+def summarize(summary, bins=DEFAULT_HISTOGRAM_BINS, rules=None, report=None):
+    parse_report = report.as_dict() if report is not None else {}
+    if not summary.total_count:
+        raise UnusableCSV('CSV file has no data rows', parse_report)
+    # A dataset needs an average of every parameter
+    empty = [col for col in NUMERIC_COLUMNS if math.isnan(summary.mean(col))]
+    if empty:
+        raise UnusableCSV(f"No numeric values in column{'s' if len(empty) > 1 else ''}: {', '.join(empty)}",
+                          parse_report)
+    frame = summary.frame()
+    return {
+        'total_count': summary.total_count,
+        'averages': {col: round(summary.mean(col), 2) for col in NUMERIC_COLUMNS},
+        'type_distribution': summary.type_distribution,
+        'statistics': compute_statistics(frame, bins),
+        # Positions index the rows in upload order
+        'anomalies': detect_anomalies(frame, rules or {}),
+        'parse_report': parse_report,
+    }
+
+
+def parse_csv_file(path, chunk_rows, bins=DEFAULT_HISTOGRAM_BINS, rules=None, engine='auto',
+                   max_row_errors=DEFAULT_MAX_ROW_ERRORS):
+    started = time.perf_counter()
+    summary = StreamingSummary()
+    report = ParseReport(max_row_errors)
+    chunks = []
+    with open(path, 'rb') as f:
+        for chunk in iter_csv_chunks(iter(lambda: f.read(1 << 16), b''), chunk_rows, report, engine):
+            summary.update(chunk)
+            chunks.append(chunk)
+
+    if chunks:
+        rows = pd.concat(chunks, ignore_index=True)
+    else:
+        rows = pd.DataFrame(columns=REQUIRED_COLUMNS)
+    result = summarize(summary, bins, rules, report)
+    result['rows'] = rows
+    result['parse_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
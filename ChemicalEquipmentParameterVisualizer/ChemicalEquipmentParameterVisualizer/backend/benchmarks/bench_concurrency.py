@@ -0,0 +1,132 @@
+"""SQLite lock contention with parallel uploaders and readers, as separate
+processes (like gunicorn workers) sharing one database file.
+
+Each configuration is run against a fresh database. 'default' is Django's
+stock SQLite setup (rollback journal, deferred transactions, 5 s busy
+timeout); 'tuned' uses the OPTIONS from settings (WAL, synchronous=NORMAL,
+IMMEDIATE transactions, longer busy timeout, mmap).
+
+    python -m benchmarks.bench_concurrency [uploaders,readers] [rows per upload] [uploads each]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+from benchmarks.common import csv_text, print_table, setup_django
+
+READ_PAUSE = 0.005
+
+
+def configure(path, options):
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    settings.REPORT_PRERENDER = False
+    settings.RETENTION_INLINE = False
+    connection.settings_dict['NAME'] = path
+    if options is not None:
+        connection.settings_dict['OPTIONS'] = options
+
+
+def migrate(path, options):
+    configure(path, options)
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def uploader(path, options, index, uploads, rows, queue):
+    configure(path, options)
+    from django.db import OperationalError
+    from api.utils import process_csv_data
+
+    texts = [csv_text(rows, seed=index * 1000 + i) for i in range(uploads)]
+    done = locked = 0
+    started = time.perf_counter()
+    for i, text in enumerate(texts):
+        try:
+            process_csv_data(text, f'upload-{index}-{i}.csv')
+            done += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    queue.put(('upload', done, locked, time.perf_counter() - started))
+
+
+def reader(path, options, stop, queue):
+    configure(path, options)
+    from django.db import OperationalError
+    from api.models import Dataset, EquipmentRow
+
+    latencies = []
+    errors = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            list(Dataset.objects.values_list('id', 'name', 'total_count')[:20])
+            list(EquipmentRow.objects.order_by('-id').values_list('equipment_name', 'pressure')[:100])
+        except OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+        time.sleep(READ_PAUSE)
+    queue.put(('read', latencies, errors))
+
+
+def run(config, options, uploaders, readers, rows, uploads):
+    ctx = get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        setup = ctx.Process(target=migrate, args=(path, options))
+        setup.start()
+        setup.join()
+
+        queue = ctx.Queue()
+        stop = ctx.Event()
+        reading = [ctx.Process(target=reader, args=(path, options, stop, queue)) for _ in range(readers)]
+        uploading = [ctx.Process(target=uploader, args=(path, options, i, uploads, rows, queue))
+                     for i in range(uploaders)]
+        for process in reading:
+            process.start()
+        started = time.perf_counter()
+        for process in uploading:
+            process.start()
+        results = [queue.get() for _ in uploading]
+        elapsed = time.perf_counter() - started
+        stop.set()
+        results += [queue.get() for _ in reading]
+        for process in reading + uploading:
+            process.join()
+
+    done = sum(result[1] for result in results if result[0] == 'upload')
+    locked = sum(result[2] for result in results if result[0] == 'upload')
+    latencies = sorted(latency for result in results if result[0] == 'read' for latency in result[1])
+    read_errors = sum(result[2] for result in results if result[0] == 'read')
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return [config, f'{done}/{uploaders * uploads}', locked, f'{elapsed:.1f}', f'{done * rows / elapsed:,.0f}',
+            len(latencies), f'{statistics.median(latencies) * 1000 if latencies else 0:.1f}',
+            f'{p95 * 1000:.1f}', f'{latencies[-1] * 1000 if latencies else 0:.0f}', read_errors]
+
+
+def main():
+    uploaders, readers = (int(value) for value in (sys.argv[1] if len(sys.argv) > 1 else '4,4').split(','))
+    rows = int(sys.argv[2].replace('_', '')) if len(sys.argv) > 2 else 50_000
+    uploads = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    setup_django()
+    from django.conf import settings
+    tuned = settings.DATABASES['default']['OPTIONS']
+    if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        sys.exit('This benchmark compares SQLite configurations; unset DATABASE_URL')
+
+    results = [run(config, options, uploaders, readers, rows, uploads)
+               for config, options in (('default', {}), ('tuned', tuned))]
+    print(f'{uploaders} uploaders x {uploads} uploads of {rows:,} rows, {readers} readers')
+    print_table(['config', 'uploads ok', 'locked', 'seconds', 'rows/s', 'reads', 'read p50 ms',
+                 'read p95 ms', 'read max ms', 'read errors'], results)
+
+
+if __name__ == '__main__':
+    main()
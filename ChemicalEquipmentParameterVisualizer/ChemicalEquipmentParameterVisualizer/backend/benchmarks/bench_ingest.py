@@ -0,0 +1,68 @@
+"""Peak RSS and throughput of CSV ingestion: whole-file read + pd.read_csv
+versus the chunked streaming path used by upload_csv.
+
+    python -m benchmarks.bench_ingest [rows,rows,...]
+"""
+import io
+import os
+import sys
+import tempfile
+
+from benchmarks.common import parse_sizes, print_table, run_isolated, setup_django, write_csv
+
+CHUNK_SIZE = 64 * 1024
+
+
+def import_pandas():
+    import pandas  # noqa: F401
+
+
+def import_parser():
+    setup_django()
+    import api.parsing  # noqa: F401
+
+
+def whole_file(path):
+    import pandas as pd
+    with open(path, 'rb') as f:
+        content = f.read().decode('utf-8')
+    df = pd.read_csv(io.StringIO(content))
+    df['Flowrate'].mean(), df['Pressure'].mean(), df['Temperature'].mean()
+    df['Type'].value_counts().to_dict()
+    return len(df)
+
+
+def streaming(path):
+    from api.parsing import StreamingSummary, iter_csv_chunks
+
+    def chunks():
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    return
+                yield data
+
+    summary = StreamingSummary()
+    for chunk in iter_csv_chunks(chunks()):
+        summary.update(chunk)
+    return summary.total_count
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [10_000, 1_000_000, 10_000_000])
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = write_csv(os.path.join(tmp, f'{rows}.csv'), rows)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for label, target, setup in (('whole-file', whole_file, import_pandas),
+                                         ('streaming', streaming, import_parser)):
+                elapsed, peak, baseline, count = run_isolated(target, path, setup=setup)
+                results.append([f'{rows:,}', f'{size_mb:.1f}', label, f'{elapsed:.2f}',
+                                f'{count / elapsed:,.0f}', f'{peak:.0f}', f'{peak - baseline:.0f}'])
+    print_table(['rows', 'file MB', 'path', 'seconds', 'rows/s', 'peak RSS MB', 'delta MB'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Parse time and peak RSS of the CSV reader: pandas' default type inference
+(the parser before typed parsing) versus the typed reader on the C engine
+and, when installed, on pyarrow.
+
+    python -m benchmarks.bench_parse [rows,rows,...]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.common import parse_sizes, print_table, run_isolated, setup_django, write_csv
+
+CHUNK_SIZE = 64 * 1024
+CHUNK_ROWS = 50000
+
+
+def import_parser():
+    setup_django()
+    import api.parsing  # noqa: F401
+
+
+def file_chunks(path):
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                return
+            yield data
+
+
+def inferred(path):
+    import io
+    import pandas as pd
+    from api.parsing import NUMERIC_COLUMNS, ChunkedStream, StreamingSummary
+
+    summary = StreamingSummary()
+    stream = io.BufferedReader(ChunkedStream(file_chunks(path)))
+    with pd.read_csv(stream, chunksize=CHUNK_ROWS, encoding='utf-8') as reader:
+        for chunk in reader:
+            for col in NUMERIC_COLUMNS:
+                chunk[col] = pd.to_numeric(chunk[col])
+            summary.update(chunk)
+    return summary.total_count
+
+
+def typed(path, engine):
+    from api.parsing import StreamingSummary, iter_csv_chunks
+
+    summary = StreamingSummary()
+    for chunk in iter_csv_chunks(file_chunks(path), CHUNK_ROWS, engine=engine):
+        summary.update(chunk)
+    return summary.total_count
+
+
+def main():
+    from api.parsing import pa
+
+    sizes = parse_sizes(sys.argv, [100_000, 1_000_000, 5_000_000])
+    paths = [('inferred', inferred, ()), ('typed (c)', typed, ('c',))]
+    if pa is not None:
+        paths.append(('typed (pyarrow)', typed, ('pyarrow',)))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = write_csv(os.path.join(tmp, f'{rows}.csv'), rows)
+            for label, target, args in paths:
+                elapsed, peak, baseline, count = run_isolated(target, path, *args, setup=import_parser)
+                results.append([f'{rows:,}', label, f'{elapsed:.2f}', f'{count / elapsed:,.0f}',
+                                f'{peak:.0f}', f'{peak - baseline:.0f}'])
+    print_table(['rows', 'parser', 'seconds', 'rows/s', 'peak RSS MB', 'delta MB'], results)
+
+
+if __name__ == '__main__':
+    setup_django()
+    main()
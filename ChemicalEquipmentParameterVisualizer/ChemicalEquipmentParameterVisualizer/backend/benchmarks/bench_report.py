@@ -0,0 +1,49 @@
+"""Cold (render) versus warm (cached file) latency of the generate_pdf endpoint.
+
+    python -m benchmarks.bench_report [rows,rows,...]
+"""
+import sys
+import tempfile
+import time
+
+from benchmarks.common import csv_text, parse_sizes, print_table, setup_test_database
+
+REPEATS = 5
+
+
+def fetch(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    size = sum(len(chunk) for chunk in response.streaming_content)
+    return time.perf_counter() - start, size
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [100, 1_000, 5_000])
+    setup_test_database()
+    from django.test import Client, override_settings
+    from api.reports import delete_reports
+    from api.utils import process_csv_data
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, override_settings(REPORT_CACHE_DIR=tmp, REPORT_PRERENDER=False):
+        client = Client()
+        for rows in sizes:
+            dataset = process_csv_data(csv_text(rows), f'bench-{rows}.csv')
+            url = f'/api/datasets/{dataset.id}/generate_pdf/'
+
+            cold = []
+            for _ in range(REPEATS):
+                delete_reports(dataset.id)
+                elapsed, size = fetch(client, url)
+                cold.append(elapsed)
+            warm = [fetch(client, url)[0] for _ in range(REPEATS)]
+
+            cold_ms, warm_ms = min(cold) * 1000, min(warm) * 1000
+            results.append([f'{rows:,}', f'{size / 1024:.0f}', f'{cold_ms:.1f}', f'{warm_ms:.2f}',
+                            f'{cold_ms / warm_ms:.0f}x'])
+    print_table(['rows', 'PDF KB', 'cold ms', 'warm ms', 'speedup'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Render time of the PDF report modes versus the old single-Table layout.
+
+    python -m benchmarks.bench_report_layout [rows,rows,...]
+
+The legacy layout is skipped above LEGACY_MAX_ROWS because its page
+splitting is super-linear.
+"""
+import sys
+import time
+
+from benchmarks.common import csv_text, parse_sizes, print_table, setup_test_database
+
+LEGACY_MAX_ROWS = 20_000
+
+
+def legacy_layout(dataset):
+    import io
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+    from api.reports import format_value
+
+    buffer = io.BytesIO()
+    data = [['Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
+    for name, eq_type, *values in dataset.rows.values_list(
+            'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'):
+        data.append([name, eq_type] + [format_value(value) for value in values])
+    table = Table(data, colWidths=[1.5*inch, 1.3*inch, 1*inch, 1*inch, 0.8*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    SimpleDocTemplate(buffer, pagesize=letter).build([table])
+    return buffer
+
+
+def timed(render):
+    start = time.perf_counter()
+    buffer = render()
+    return time.perf_counter() - start, len(buffer.getvalue())
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [1_000, 10_000, 100_000])
+    setup_test_database()
+    from django.test import override_settings
+    from api.reports import generate_pdf_report
+    from api.utils import process_csv_data
+
+    results = []
+    with override_settings(REPORT_PRERENDER=False, REPORT_MAX_ROWS=max(sizes)):
+        for rows in sizes:
+            dataset = process_csv_data(csv_text(rows), f'bench-{rows}.csv')
+            renders = [
+                ('full', lambda: generate_pdf_report(dataset, 'full')),
+                ('summary', lambda: generate_pdf_report(dataset, 'summary')),
+                ('outliers', lambda: generate_pdf_report(dataset, 'outliers', 50)),
+            ]
+            if rows <= LEGACY_MAX_ROWS:
+                renders.insert(0, ('legacy table', lambda: legacy_layout(dataset)))
+            for label, render in renders:
+                elapsed, size = timed(render)
+                results.append([f'{rows:,}', label, f'{elapsed:.2f}', f'{rows / elapsed:,.0f}', f'{size / 1024:,.0f}'])
+    print_table(['rows', 'layout', 'seconds', 'rows/s', 'PDF KB'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Payload size and serialize/parse time of the row table wire formats.
+
+    python -m benchmarks.bench_wire [rows,rows,...]
+
+Each format renders a dataset detail payload with every row embedded, as
+returned by /api/datasets/{id}/?include_rows=true. MessagePack, Arrow and
+Brotli columns are skipped when the package is not installed.
+"""
+import gzip
+import json
+import random
+import sys
+import time
+
+from benchmarks.common import EQUIPMENT_TYPES, parse_sizes, print_table, setup_django
+
+COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+
+def make_rows(rows, seed=0):
+    rng = random.Random(seed)
+    result = []
+    for i in range(rows):
+        eq_type = rng.choice(EQUIPMENT_TYPES)
+        result.append((f'{eq_type}-{i}', eq_type, round(rng.uniform(50, 250), 1),
+                       round(rng.uniform(1, 12), 2), round(rng.uniform(60, 180), 1)))
+    return result
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def formats():
+    from api import renderers
+    from rest_framework.renderers import JSONRenderer
+
+    yield 'json rows', False, JSONRenderer(), json.loads
+    yield 'json columnar', True, renderers.ColumnarJSONRenderer(), json.loads
+    if renderers.msgpack is not None:
+        yield 'msgpack', True, renderers.MessagePackRenderer(), renderers.msgpack.unpackb
+    if renderers.pa is not None:
+        yield 'arrow', True, renderers.ArrowRenderer(), lambda body: renderers.pa.ipc.open_stream(body).read_all()
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [10_000, 1_000_000])
+    setup_django()
+    from api.middleware import BROTLI_QUALITY, brotli
+    from api.renderers import table_payload
+
+    results = []
+    for rows in sizes:
+        table = make_rows(rows)
+        for label, columnar, renderer, parse in formats():
+            build_seconds, payload = timed(table_payload, COLUMNS, table, columnar)
+            data = {'id': 1, 'name': 'bench.csv', 'total_count': rows, 'csv_data': payload}
+            render_seconds, body = timed(renderer.render, data)
+            parse_seconds, _ = timed(parse, body)
+            row = [f'{rows:,}', label, f'{(build_seconds + render_seconds) * 1000:,.0f}',
+                   f'{parse_seconds * 1000:,.0f}', f'{len(body) / 1024:,.0f}',
+                   f'{len(gzip.compress(body, 6)) / 1024:,.0f}']
+            if brotli is not None:
+                row.append(f'{len(brotli.compress(body, quality=BROTLI_QUALITY)) / 1024:,.0f}')
+            results.append(row)
+
+    headers = ['rows', 'format', 'serialize ms', 'parse ms', 'KB', 'gzip KB']
+    if brotli is not None:
+        headers.append('br KB')
+    print_table(headers, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import os
+import random
+import resource
+import sys
+import time
+from multiprocessing import get_context
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EQUIPMENT_TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+
+def setup_django():
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'equipment_api.settings')
+    import django
+    django.setup()
+
+
+def setup_test_database():
+    setup_django()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def csv_lines(rows, seed=0):
+    rng = random.Random(seed)
+    yield 'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+    for i in range(rows):
+        eq_type = rng.choice(EQUIPMENT_TYPES)
+        yield (f'{eq_type}-{i},{eq_type},{rng.uniform(50, 250):.1f},'
+               f'{rng.uniform(1, 12):.2f},{rng.uniform(60, 180):.1f}\n')
+
+
+def write_csv(path, rows, seed=0):
+    with open(path, 'w') as f:
+        f.writelines(csv_lines(rows, seed))
+    return path
+
+
+def csv_text(rows, seed=0):
+    return ''.join(csv_lines(rows, seed))
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _measure(target, args, setup, queue):
+    if setup is not None:
+        setup()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    result = target(*args)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, peak_rss_mb(), baseline, result))
+
+
+def run_isolated(target, *args, setup=None):
+    """Run ``target`` in a fresh process and return (seconds, peak RSS MB,
+    RSS MB before the call, return value). ``setup`` runs first, outside
+    the timed region, to keep import costs out of the numbers."""
+    ctx = get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(target, args, setup, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def parse_sizes(argv, default):
+    if len(argv) > 1:
+        return [int(value.replace('_', '')) for value in argv[1].split(',')]
+    return default
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:>{width}}}' for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
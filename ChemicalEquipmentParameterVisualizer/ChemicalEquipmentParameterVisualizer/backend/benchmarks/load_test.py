@@ -0,0 +1,189 @@
+"""WSGI vs ASGI under concurrent load. Each configuration is served by
+gunicorn on a scratch SQLite database: 'wsgi' with sync workers running the
+DRF views, 'asgi' with uvicorn workers running the async views
+(ASYNC_VIEWS). The ASGI run needs `pip install uvicorn uvicorn-worker`.
+
+Fast clients cycle through the list, detail, summary and PDF endpoints for
+a fixed time; slow clients keep uploading CSVs whose bodies trickle in, the
+way a client on a poor link does. Reported: completed fast requests per
+second and their latency, and how many slow uploads finished.
+
+    python -m benchmarks.load_test [fast clients] [seconds] [slow clients] [server workers]
+"""
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import BACKEND_DIR, csv_text, print_table
+
+HOST = '127.0.0.1'
+SEED_ROWS = 2_000
+SLOW_UPLOAD_ROWS = 1_000
+TRICKLE_BYTES = 2048
+TRICKLE_PAUSE = 0.1
+REQUEST_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def uvicorn_worker_class():
+    if importlib.util.find_spec('uvicorn_worker'):
+        return 'uvicorn_worker.UvicornWorker'
+    if importlib.util.find_spec('uvicorn'):
+        return 'uvicorn.workers.UvicornWorker'
+    return None
+
+
+def multipart(name, content):
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f'Content-Type: text/csv\r\n\r\n').encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+async def request(port, method, path, body=b'', content_type=None, trickle=False):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        head = f'{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\nContent-Length: {len(body)}\r\n'
+        if content_type:
+            head += f'Content-Type: {content_type}\r\n'
+        writer.write(head.encode() + b'\r\n')
+        if trickle:
+            for start in range(0, len(body), TRICKLE_BYTES):
+                writer.write(body[start:start + TRICKLE_BYTES])
+                await writer.drain()
+                await asyncio.sleep(TRICKLE_PAUSE)
+        else:
+            writer.write(body)
+        await writer.drain()
+        status_line = await reader.readline()
+        content = await reader.read()
+        return int(status_line.split()[1]), content.partition(b'\r\n\r\n')[2]
+    finally:
+        writer.close()
+
+
+async def wait_until_up(port, process, deadline=30):
+    started = time.perf_counter()
+    while time.perf_counter() - started < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            await request(port, 'GET', '/api/metrics/')
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+async def fast_client(port, paths, offset, deadline, latencies, errors):
+    i = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status, _ = await asyncio.wait_for(request(port, 'GET', paths[i % len(paths)]), REQUEST_TIMEOUT)
+            if status != 200:
+                errors.append(status)
+        except (OSError, asyncio.TimeoutError) as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+        i += 1
+
+
+async def slow_client(port, index, deadline, uploads):
+    upload = 0
+    while time.perf_counter() < deadline:
+        body, content_type = multipart(f'slow-{index}-{upload}.csv',
+                                       csv_text(SLOW_UPLOAD_ROWS, seed=index * 10_000 + upload).encode())
+        try:
+            status, _ = await request(port, 'POST', '/api/upload/', body, content_type, trickle=True)
+            if status in (200, 201):
+                uploads.append(status)
+        except OSError:
+            pass
+        upload += 1
+
+
+async def load(port, fast, slow, seconds):
+    body, content_type = multipart('seed.csv', csv_text(SEED_ROWS).encode())
+    status, content = await request(port, 'POST', '/api/upload/', body, content_type)
+    if status != 201:
+        raise RuntimeError(f'seed upload failed with {status}: {content[:200]}')
+    dataset_id = int(content.split(b'"id":', 1)[1].split(b',', 1)[0])
+    paths = ['/api/datasets/', f'/api/datasets/{dataset_id}/', f'/api/datasets/{dataset_id}/summary/',
+             f'/api/datasets/{dataset_id}/generate_pdf/']
+    for path in paths:
+        # Warm the response cache and the rendered report
+        await request(port, 'GET', path)
+
+    latencies, errors, uploads = [], [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(fast_client(port, paths, i, deadline, latencies, errors) for i in range(fast)),
+        *(slow_client(port, i, deadline, uploads) for i in range(slow)),
+    )
+    return latencies, errors, uploads
+
+
+def run(config, command, extra_env, fast, slow, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'SQLITE_PATH': os.path.join(tmp, 'load.sqlite3'),
+            'REPORT_CACHE_DIR': os.path.join(tmp, 'reports'),
+            'UPLOAD_SPOOL_DIR': os.path.join(tmp, 'spool'),
+            'RETENTION_INLINE': 'False',
+            'DEBUG': 'False',
+            **extra_env,
+        }
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v0'], cwd=BACKEND_DIR, env=env,
+                       check=True)
+        port = free_port()
+        server = subprocess.Popen([*command, '--bind', f'{HOST}:{port}', '--log-level', 'warning'],
+                                  cwd=BACKEND_DIR, env=env)
+        try:
+            asyncio.run(wait_until_up(port, server))
+            latencies, errors, uploads = asyncio.run(load(port, fast, slow, seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    def percentile(q):
+        return latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0
+    return [config, len(latencies), f'{len(latencies) / seconds:.1f}', f'{percentile(0.5):.1f}',
+            f'{percentile(0.99):.1f}', f'{latencies[-1] * 1000 if latencies else 0:.0f}', len(errors), len(uploads)]
+
+
+def main():
+    fast = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    slow = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    workers = sys.argv[4] if len(sys.argv) > 4 else '2'
+
+    gunicorn = [sys.executable, '-m', 'gunicorn', '--workers', workers, '--timeout', '120']
+    configs = [('wsgi', [*gunicorn, 'equipment_api.wsgi:application'], {})]
+    worker_class = uvicorn_worker_class()
+    if worker_class is None:
+        print('uvicorn is not installed; skipping the ASGI run')
+    else:
+        configs.append(('asgi', [*gunicorn, '--worker-class', worker_class, 'equipment_api.asgi:application'],
+                        {'ASYNC_VIEWS': 'True'}))
+
+    results = [run(config, command, extra_env, fast, slow, seconds) for config, command, extra_env in configs]
+    print(f'{fast} fast clients, {slow} slow uploaders, {workers} workers, {seconds:g} s')
+    print_table(['server', 'requests', 'req/s', 'p50 ms', 'p99 ms', 'max ms', 'errors', 'slow uploads'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Dataset switching with and without the response cache, against a running
+backend (API_BASE_URL, default http://localhost:8000/api). Missing bench
+datasets are uploaded and pinned first.
+
+A switch makes the requests the app makes on selecting a dataset: the
+detail, the first rows page and the chart data, concurrently. Switches follow a
+recency-biased trace (mostly among the last few datasets viewed). Reported:
+cache hit rate (304 or served offline) and switch latency, for no cache, a
+cache large enough for every dataset, one that holds about three, and the
+full cache with the server unreachable.
+
+    python -m benchmarks.bench_cache [switches] [datasets]
+"""
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.common import make_columns, print_table, qt_app
+
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000/api').rstrip('/')
+BENCH_ROWS = 5_000
+RECENT = 3
+RECENT_SHARE = 0.8
+
+
+class Unreachable(HTTPAdapter):
+    def send(self, request, **kwargs):
+        raise requests.ConnectionError('server unreachable')
+
+
+def bench_datasets(count):
+    ids = []
+    for i in range(count):
+        columns = make_columns(BENCH_ROWS, seed=i)
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(list(columns))
+        writer.writerows(zip(*columns.values()))
+        # Uploads are deduplicated by content, so reruns reuse the datasets
+        response = requests.post(f'{API_BASE_URL}/upload/', files={'file': (f'bench-{i}.csv', out.getvalue())})
+        response.raise_for_status()
+        ids.append(response.json()['id'])
+        # Pinned so that retention keeps them all
+        requests.post(f"{API_BASE_URL}/datasets/{ids[-1]}/pin/").raise_for_status()
+    return ids
+
+
+def switch_trace(ids, switches, seed=0):
+    rng = random.Random(seed)
+    recent, trace = [], []
+    for _ in range(switches):
+        if len(recent) == RECENT and rng.random() < RECENT_SHARE:
+            dataset_id = rng.choice(recent)
+        else:
+            dataset_id = rng.choice(ids)
+        trace.append(dataset_id)
+        recent = ([dataset_id] + [other for other in recent if other != dataset_id])[:RECENT]
+    return trace
+
+
+def switch(app, api, dataset_id):
+    from charts import METHODS, MIN_POINTS, SCATTER_X, SCATTER_Y
+    from main import ROWS_ACCEPT, ROWS_PAGE_SIZE, decode_rows_page
+    done, errors = [], []
+    started = time.perf_counter()
+    api.get(f'datasets/{dataset_id}/', dataset_id=dataset_id, on_result=done.append, on_error=errors.append)
+    api.get(f'datasets/{dataset_id}/rows/', params={'limit': ROWS_PAGE_SIZE, 'offset': 0},
+            headers={'Accept': ROWS_ACCEPT}, decode=decode_rows_page, dataset_id=dataset_id,
+            on_result=done.append, on_error=errors.append)
+    chart_params = {'points': MIN_POINTS, 'method': METHODS[0][1], 'x': SCATTER_X, 'y': SCATTER_Y}
+    api.get(f'datasets/{dataset_id}/chart-data/', params=chart_params, dataset_id=dataset_id,
+            on_result=done.append, on_error=errors.append)
+    while len(done) < 3 and not errors:
+        app.processEvents()
+        time.sleep(0.0005)
+    if errors:
+        raise RuntimeError(errors[0])
+    return time.perf_counter() - started
+
+
+def run(app, trace, cache, offline=False):
+    from network import ApiClient
+    api = ApiClient(API_BASE_URL, cache)
+    if offline:
+        api.session.mount('http://', Unreachable())
+        api.session.mount('https://', Unreachable())
+    latencies = sorted(switch(app, api, dataset_id) for dataset_id in trace)
+    stats = cache.stats() if cache else None
+    api.pool.waitForDone()
+    api.session.close()
+    return latencies, stats
+
+
+def main():
+    switches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    app = qt_app()
+    from dataset_cache import ResponseCache
+    ids = bench_datasets(count)
+    trace = switch_trace(ids, switches)
+
+    results = []
+
+    def report(name, latencies, stats):
+        def percentile(q):
+            return latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000
+        results.append([name, f"{stats['hit_rate']:.0%}" if stats else '-', f'{percentile(0.5):.1f}',
+                        f'{percentile(0.95):.1f}', f"{stats['bytes'] / 1024:,.0f}" if stats else '-'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report('no cache', *run(app, trace, None))
+        full = ResponseCache(os.path.join(tmp, 'full.sqlite3'), max_bytes=1 << 40)
+        latencies, stats = run(app, trace, full)
+        report('cache', latencies, stats)
+        per_dataset = stats['bytes'] / len(set(trace))
+        small = ResponseCache(os.path.join(tmp, 'small.sqlite3'), max_bytes=int(per_dataset * RECENT))
+        report(f'cache, {RECENT} datasets', *run(app, trace, small))
+        full.counts.clear()
+        report('offline', *run(app, trace, full, offline=True))
+        full.close()
+        small.close()
+
+    print(f'{switches} switches over {count} datasets of {BENCH_ROWS:,} rows')
+    print_table(['client', 'hit rate', 'p50 ms', 'p95 ms', 'cache KB'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Charts tab: frame time of the old charts and of ChartsWidget, with chart
+data built from memory so only drawing is measured.
+
+- old charts: figure.clear() and a full redraw of the bar, pie and a
+  1,000 point scatter, as on every selection before.
+- every row, rebuilt: the same with the scatter over every row.
+- every row, pan: a persistent scatter of every row, redrawn for a pan.
+- widget, pan / new data: ChartsWidget's scatter, downsampled to its point
+  budget, redrawn for a pan or after its artists take new data.
+- widget, hover: the blitted hover readout.
+
+The server's LTTB and min-max keep as many points as the budget; which
+ones does not change the drawing cost, so evenly spaced ones are kept here.
+
+    python -m benchmarks.bench_charts 10000,100000,1000000
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import make_columns, parse_sizes, print_table, qt_app
+
+OLD_POINTS = 1000
+MIN_FRAMES = 3
+MAX_FRAMES = 30
+# Stop repeating a frame once it has taken this long in total
+FRAME_BUDGET_S = 5
+
+
+def frame_ms(frame):
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_FRAMES and (len(times) < MIN_FRAMES or time.perf_counter() - started < FRAME_BUDGET_S):
+        frame_started = time.perf_counter()
+        frame(len(times))
+        times.append(time.perf_counter() - frame_started)
+    return statistics.median(times) * 1000
+
+
+def chart_data(columns, points):
+    from charts import PARAMETERS, SCATTER_X, SCATTER_Y
+    x = np.asarray(columns[SCATTER_X])
+    order = np.argsort(x, kind='stable')
+    keep = order[np.linspace(0, len(order) - 1, min(points, len(order))).astype(np.int64)]
+    types = np.asarray(columns['Type'], dtype=object)
+    histograms, box_plots = {}, {}
+    for col in PARAMETERS:
+        values = np.asarray(columns[col])
+        counts, edges = np.histogram(values, bins=10)
+        histograms[col] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+        for eq_type in np.unique(types):
+            q1, median, q3 = np.percentile(values[types == eq_type], [25, 50, 75])
+            box_plots.setdefault(eq_type, {})[col] = {
+                'q1': q1, 'median': median, 'q3': q3, 'whisker_low': q1 - 1.5 * (q3 - q1),
+                'whisker_high': q3 + 1.5 * (q3 - q1)}
+    return {
+        'histograms': histograms,
+        'box_plots': box_plots,
+        'scatter': {
+            'x': SCATTER_X, 'y': SCATTER_Y, 'method': 'lttb', 'total_points': len(x),
+            'points': {SCATTER_X: x[keep].tolist(), SCATTER_Y: np.asarray(columns[SCATTER_Y])[keep].tolist(),
+                       'Type': types[keep].tolist()},
+        },
+    }
+
+
+def old_charts(figure, canvas, xs, ys):
+    """display_charts as it was, minus the dataset averages it took."""
+    figure.clear()
+    ax1 = figure.add_subplot(1, 3, 1)
+    ax1.bar(['Flowrate', 'Pressure', 'Temperature'], [150, 6.5, 120], color=['#3498db', '#e74c3c', '#f39c12'],
+            alpha=0.7)
+    ax1.set_title('Average Values by Parameter')
+    ax1.grid(True, alpha=0.3)
+    ax2 = figure.add_subplot(1, 3, 2)
+    ax2.pie([3, 2, 2, 1, 1, 1], labels=['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser'],
+            autopct='%1.1f%%', startangle=90)
+    ax3 = figure.add_subplot(1, 3, 3)
+    ax3.scatter(xs, ys, s=4, alpha=0.5, color='#3498db')
+    ax3.grid(True, alpha=0.3)
+    figure.tight_layout()
+    canvas.draw()
+
+
+def measure(rows):
+    app = qt_app()
+    from matplotlib.backend_bases import MouseEvent
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.figure import Figure
+    from charts import SCATTER_X, SCATTER_Y, ChartsWidget
+
+    columns = make_columns(rows)
+    xs, ys = np.asarray(columns[SCATTER_X]), np.asarray(columns[SCATTER_Y])
+    results = []
+
+    figure = Figure(figsize=(15, 5))
+    canvas = FigureCanvas(figure)
+    canvas.resize(1400, 500)
+    step = max(len(xs) // OLD_POINTS, 1)
+    results.append(('old charts', frame_ms(lambda i: old_charts(figure, canvas, xs[::step], ys[::step]))))
+    results.append(('every row, rebuilt', frame_ms(lambda i: old_charts(figure, canvas, xs, ys))))
+
+    ax = figure.axes[2]
+    low, high = ax.get_xlim()
+    def pan(ax, canvas, low, high):
+        def frame(i):
+            shift = (high - low) * 0.01 * (i % 10)
+            ax.set_xlim(low + shift, high + shift)
+            canvas.draw()
+        return frame
+    results.append(('every row, pan', frame_ms(pan(ax, canvas, low, high))))
+
+    widget = ChartsWidget(lambda params, on_result, on_error: None)
+    widget.resize(1400, 600)
+    widget.show()
+    app.processEvents()
+    data = chart_data(columns, widget.points_budget())
+    widget.chart_data_loaded(data)
+    widget.canvas.draw()
+    ax = widget.scatter_ax
+    low, high = ax.get_xlim()
+    results.append((f'widget, pan ({widget.points_budget():,} pts)', frame_ms(pan(ax, widget.canvas, low, high))))
+    ax.set_xlim(low, high)
+
+    def new_data(i):
+        widget.chart_data_loaded(data)
+        widget.canvas.draw()
+    results.append(('widget, new data', frame_ms(new_data)))
+
+    offsets = ax.transData.transform(widget.points.get_offsets())
+    def hover(i):
+        x, y = offsets[(i * 37) % len(offsets)]
+        widget.hover(MouseEvent('motion_notify_event', widget.canvas, x, y))
+    results.append(('widget, hover (blit)', frame_ms(hover)))
+    return results
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [10_000, 100_000, 1_000_000])
+    rows = []
+    for size in sizes:
+        for name, ms in measure(size):
+            rows.append([f'{size:,}', name, f'{ms:,.1f}'])
+    print_table(['rows', 'frame', 'ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Data table: time to first paint and memory of the old QTableWidget (one
+item per cell for every row) vs RowsTableModel (one page up front, more as
+the view scrolls), with rows served from memory so only the client is
+measured. 'all rows' scrolls the model until every row is loaded.
+
+Memory is peak RSS above the process after generating the rows. The widget
+table is skipped above WIDGET_MAX_ROWS, where it takes minutes and GBs.
+
+    python -m benchmarks.bench_table 10000,100000,1000000
+"""
+import sys
+import time
+
+from benchmarks.common import (make_columns, page_fetcher, parse_sizes, peak_rss_mb, print_table, qt_app,
+                               run_isolated)
+
+WIDGET_MAX_ROWS = 200_000
+
+
+def paint(app, view):
+    view.show()
+    app.processEvents()
+    view.viewport().repaint()
+
+
+def widget_table(rows):
+    app = qt_app()
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
+    columns = make_columns(rows)
+    headers = list(columns)
+    baseline = peak_rss_mb()
+
+    started = time.perf_counter()
+    table = QTableWidget()
+    table.setColumnCount(len(headers))
+    table.setRowCount(rows)
+    table.setHorizontalHeaderLabels(headers)
+    for col_idx, header in enumerate(headers):
+        for row_idx, value in enumerate(columns[header]):
+            table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
+    paint(app, table)
+    return time.perf_counter() - started, peak_rss_mb() - baseline, None, None
+
+
+def model_table(rows):
+    app = qt_app()
+    from PyQt5.QtWidgets import QTableView
+    from table_model import RowsTableModel
+    columns = make_columns(rows)
+    baseline = peak_rss_mb()
+
+    started = time.perf_counter()
+    model = RowsTableModel(page_fetcher(columns))
+    view = QTableView()
+    view.setModel(model)
+    model.load()
+    paint(app, view)
+    first_paint = time.perf_counter() - started
+    first_rss = peak_rss_mb() - baseline
+
+    started = time.perf_counter()
+    while model.canFetchMore():
+        model.fetchMore()
+    view.scrollToBottom()
+    paint(app, view)
+    return first_paint, first_rss, time.perf_counter() - started, peak_rss_mb() - baseline
+
+
+def main():
+    sizes = parse_sizes(sys.argv, [10_000, 100_000, 1_000_000])
+    results = []
+    for rows in sizes:
+        for name, target in (('QTableWidget', widget_table), ('RowsTableModel', model_table)):
+            if target is widget_table and rows > WIDGET_MAX_ROWS:
+                results.append([f'{rows:,}', name, 'skipped', '', '', ''])
+                continue
+            first_paint, first_rss, all_rows, all_rss = run_isolated(target, rows)
+            results.append([
+                f'{rows:,}', name, f'{first_paint * 1000:,.0f}', f'{first_rss:,.1f}',
+                f'{all_rows:.2f}' if all_rows is not None else '-',
+                f'{all_rss:,.1f}' if all_rss is not None else '-',
+            ])
+    print_table(['rows', 'table', 'first paint ms', 'RSS MB', 'all rows s', 'all rows RSS MB'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import json
+import os
+import random
+import resource
+import sys
+from multiprocessing import get_context
+
+EQUIPMENT_TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+
+def qt_app():
+    # Benchmarks render offscreen unless a platform is chosen explicitly
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def make_columns(rows, seed=0):
+    """Equipment rows in the columnar shape of the rows API."""
+    rng = random.Random(seed)
+    types = [rng.choice(EQUIPMENT_TYPES) for _ in range(rows)]
+    return {
+        'Equipment Name': [f'{eq_type}-{i}' for i, eq_type in enumerate(types)],
+        'Type': types,
+        'Flowrate': [round(rng.uniform(50, 250), 1) for _ in range(rows)],
+        'Pressure': [round(rng.uniform(1, 12), 2) for _ in range(rows)],
+        'Temperature': [round(rng.uniform(60, 180), 1) for _ in range(rows)],
+    }
+
+
+def page_fetcher(columns):
+    """A RowsTableModel fetch_page serving ``columns`` from memory and
+    answering synchronously. Pages go through JSON so the client decodes its
+    own copy, as with the API."""
+    total = len(columns['Equipment Name'])
+
+    def fetch_page(params, offset, limit, on_page, on_error):
+        page = {'count': total, 'results': {col: values[offset:offset + limit] for col, values in columns.items()}}
+        on_page(json.loads(json.dumps(page)))
+    return fetch_page
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _call(target, args, queue):
+    queue.put(target(*args))
+
+
+def run_isolated(target, *args):
+    """Run ``target`` in a fresh process so its peak RSS is its own."""
+    ctx = get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_call, args=(target, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def parse_sizes(argv, default):
+    if len(argv) > 1:
+        return [int(value.replace('_', '')) for value in argv[1].split(',')]
+    return default
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:>{width}}}' for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
@@ -0,0 +1,369 @@
+"""Charts tab of the desktop client: a Pressure vs Temperature scatter
+coloured by Type, a histogram and per-Type box plots of one parameter.
+
+The figure and its artists are built once and a new dataset only updates
+their data. The scatter comes downsampled by the chart-data endpoint (LTTB
+or min-max) to about one point per pixel of the axes, and after a pan or
+zoom the visible range is requested again, so zooming in shows detail
+without ever drawing every row. Redraws for a pan or zoom paint the scatter
+axes alone over a cached image of the rest of the figure, and the hover
+readout is blitted over a cached background of the scatter.
+"""
+import numpy as np
+from matplotlib.backend_bases import DrawEvent
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
+from matplotlib.colors import to_rgba_array
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QComboBox, QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+PARAMETERS = ['Flowrate', 'Pressure', 'Temperature']
+SCATTER_X = 'Temperature'
+SCATTER_Y = 'Pressure'
+METHODS = [('LTTB', 'lttb'), ('Min-max', 'minmax')]
+TYPE_COLORS = to_rgba_array(['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6', '#1abc9c', '#34495e',
+                             '#e67e22'])
+# Points requested per pixel of scatter width, within the server's limits
+POINTS_PER_PIXEL = 2
+MIN_POINTS = 500
+MAX_POINTS = 10000
+# Wait for a pan or zoom to settle before requesting the visible range
+VIEW_SETTLE_MS = 250
+HOVER_RADIUS_PX = 8
+
+
+def view_range(low, high):
+    """``low``..``high`` widened to a multiple of about a thousandth of its
+    width, so that nearly identical views share cache entries."""
+    exponent = int(np.floor(np.log10(max(high - low, 1e-9) / 1000)))
+    step = 10.0 ** exponent
+    decimals = max(-exponent, 0)
+    return f'{np.floor(low / step) * step:.{decimals}f}', f'{np.ceil(high / step) * step:.{decimals}f}'
+
+
+class ChartsCanvas(FigureCanvas):
+    """Canvas that can redraw ``live_axes`` on its own. A full draw leaves
+    it out and keeps an image of the rest of the figure; later draws, while
+    no other axes is stale and the size is unchanged, paint only
+    ``live_axes`` over that image."""
+
+    def __init__(self, figure):
+        super().__init__(figure)
+        self.live_axes = None
+        self.static = None
+        self.static_size = None
+        # Connected first, so draw_event handlers see the whole figure
+        self.mpl_connect('draw_event', self.draw_live_axes)
+
+    def draw(self):
+        ax = self.live_axes
+        if ax is None:
+            super().draw()
+            return
+        size = self.get_width_height(physical=True)
+        if (self.static is not None and size == self.static_size
+                and not any(other.stale for other in self.figure.axes if other is not ax)):
+            renderer = self.get_renderer()
+            self.restore_region(self.static)
+            self.figure.draw_artist(ax)
+            self.callbacks.process('draw_event', DrawEvent('draw_event', self, renderer))
+            self.update()
+            return
+        # Only on screen: saving the figure still draws every axes
+        ax.set_animated(True)
+        try:
+            super().draw()
+        finally:
+            ax.set_animated(False)
+
+    def draw_all(self):
+        """Schedule a full draw, which also lays the figure out again."""
+        self.static = None
+        self.draw_idle()
+
+    def draw_live_axes(self, event):
+        if self.live_axes is not None and self.live_axes.get_animated():
+            self.static = self.copy_from_bbox(self.figure.bbox)
+            self.static_size = self.get_width_height(physical=True)
+            self.figure.draw_artist(self.live_axes)
+
+
+class ChartsWidget(QWidget):
+    """``fetch_chart_data(params, on_result, on_error)`` starts a request to
+    the chart-data endpoint of the selected dataset, like
+    RowsTableModel's fetch_page."""
+
+    def __init__(self, fetch_chart_data, parent=None):
+        super().__init__(parent)
+        self.fetch_chart_data = fetch_chart_data
+        self.chart_data = None
+        self.extent = None
+        # Types in colour order; fixed by the full load of a dataset
+        self.type_order = []
+        self.point_types = np.empty(0, dtype=object)
+        self.generation = 0
+        self.pending = None
+        self.background = None
+        self.updating_view = False
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('Parameter:'))
+        self.parameter_combo = QComboBox()
+        self.parameter_combo.addItems(PARAMETERS)
+        self.parameter_combo.currentIndexChanged.connect(self.parameter_changed)
+        controls.addWidget(self.parameter_combo)
+        controls.addWidget(QLabel('Downsampling:'))
+        self.method_combo = QComboBox()
+        for label, method in METHODS:
+            self.method_combo.addItem(label, method)
+        self.method_combo.currentIndexChanged.connect(self.request_view)
+        controls.addWidget(self.method_combo)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.figure = Figure(figsize=(15, 5), layout='constrained')
+        self.canvas = ChartsCanvas(self.figure)
+        layout.addWidget(NavigationToolbar2QT(self.canvas, self))
+        layout.addWidget(self.canvas)
+        self.build_figure()
+
+        self.view_timer = QTimer(self)
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(VIEW_SETTLE_MS)
+        self.view_timer.timeout.connect(self.request_view)
+
+    def build_figure(self):
+        grid = self.figure.add_gridspec(2, 2, width_ratios=[3, 2])
+        self.scatter_ax = self.figure.add_subplot(grid[:, 0])
+        self.canvas.live_axes = self.scatter_ax
+        self.hist_ax = self.figure.add_subplot(grid[0, 1])
+        self.box_ax = self.figure.add_subplot(grid[1, 1])
+
+        self.points = self.scatter_ax.scatter(np.empty(0), np.empty(0), s=6, linewidths=0, alpha=0.6)
+        self.scatter_ax.set_xlabel(SCATTER_X)
+        self.scatter_ax.set_ylabel(SCATTER_Y)
+        self.scatter_ax.grid(True, alpha=0.3)
+        self.type_legend = None
+        self.scatter_ax.callbacks.connect('xlim_changed', self.view_changed)
+        self.scatter_ax.callbacks.connect('ylim_changed', self.view_changed)
+
+        # Drawn only by blitting, on top of the cached background
+        self.highlight, = self.scatter_ax.plot([], [], 'o', markersize=9, markerfacecolor='none',
+                                               markeredgecolor='black', animated=True)
+        self.readout = self.scatter_ax.annotate('', (0, 0), xytext=(10, 10), textcoords='offset points',
+                                                bbox={'boxstyle': 'round', 'fc': 'white', 'alpha': 0.9},
+                                                animated=True)
+
+        self.bars = self.hist_ax.stairs(np.zeros(1), np.arange(2), fill=True, alpha=0.7, color='#3498db')
+        self.hist_ax.set_ylabel('Count')
+        self.hist_ax.grid(True, alpha=0.3)
+        self.boxes = {}
+        self.box_ax.grid(True, alpha=0.3)
+        self.box_ax.tick_params(axis='x', labelrotation=30)
+
+        self.canvas.mpl_connect('draw_event', self.save_background)
+        self.canvas.mpl_connect('motion_notify_event', self.hover)
+
+    def points_budget(self):
+        pixels = int(self.scatter_ax.bbox.width)
+        return min(max(pixels * POINTS_PER_PIXEL, MIN_POINTS), MAX_POINTS)
+
+    def cancel(self):
+        self.generation += 1
+        self.view_timer.stop()
+        if self.pending is not None and hasattr(self.pending, 'cancel'):
+            self.pending.cancel()
+        self.pending = None
+
+    def clear(self):
+        self.cancel()
+        self.chart_data = None
+        self.extent = None
+        self.type_order = []
+        self.set_scatter(None)
+        self.bars.set_data(np.zeros(1), np.arange(2))
+        self.set_boxes({})
+        self.canvas.draw_idle()
+
+    def load(self):
+        """Fetch the whole dataset's chart data."""
+        self.cancel()
+        self.type_order = []
+        self.request({}, self.chart_data_loaded)
+
+    def request(self, params, on_result):
+        generation = self.generation
+        params = {**params, 'points': self.points_budget(), 'method': self.method_combo.currentData(),
+                  'x': SCATTER_X, 'y': SCATTER_Y}
+        self.pending = self.fetch_chart_data(
+            params, lambda data: generation == self.generation and on_result(data),
+            lambda error: generation == self.generation and self.chart_data_failed(error))
+
+    def chart_data_loaded(self, chart_data):
+        self.pending = None
+        self.chart_data = chart_data
+        self.set_scatter(chart_data['scatter'])
+        self.show_full_extent()
+        self.show_parameter()
+
+    def chart_data_failed(self, error):
+        self.pending = None
+        self.scatter_ax.set_title(f'Chart data unavailable: {error}')
+        self.canvas.draw_idle()
+
+    def view_loaded(self, chart_data):
+        self.pending = None
+        self.set_scatter(chart_data['scatter'])
+        # Pan and zoom frames skip the layout; the settled view gets one
+        self.canvas.draw_all()
+
+    def set_scatter(self, scatter):
+        self.highlight.set_data([], [])
+        self.readout.set_visible(False)
+        if scatter is None:
+            self.points.set_offsets(np.empty((0, 2)))
+            self.scatter_ax.set_title('')
+            self.set_legend()
+            return
+        points = scatter['points']
+        offsets = np.column_stack([np.asarray(points[SCATTER_X], dtype=np.float64),
+                                   np.asarray(points[SCATTER_Y], dtype=np.float64)])
+        self.point_types = np.asarray(points['Type'], dtype=object)
+        types, codes = np.unique(self.point_types, return_inverse=True)
+        self.type_order += [eq_type for eq_type in types if eq_type not in self.type_order]
+        lookup = np.array([self.type_order.index(eq_type) for eq_type in types], dtype=np.int64)
+        self.points.set_offsets(offsets)
+        self.points.set_facecolor(TYPE_COLORS[lookup[codes] % len(TYPE_COLORS)] if len(codes) else 'none')
+        self.set_legend()
+        self.scatter_ax.set_title(f"{SCATTER_Y} vs {SCATTER_X} ({len(offsets):,} of "
+                                  f"{scatter['total_points']:,} points, {scatter['method']})")
+
+    def set_legend(self):
+        labels = [text.get_text() for text in self.type_legend.get_texts()] if self.type_legend else []
+        if labels == self.type_order:
+            return
+        if self.type_legend is not None:
+            self.type_legend.remove()
+            self.type_legend = None
+        if self.type_order:
+            self.type_legend = self.scatter_ax.legend(
+                handles=[Line2D([], [], marker='o', linestyle='', color=TYPE_COLORS[i % len(TYPE_COLORS)],
+                                label=name) for i, name in enumerate(self.type_order)],
+                loc='upper right', fontsize='small')
+
+    def show_full_extent(self):
+        offsets = self.points.get_offsets()
+        if not len(offsets):
+            self.extent = None
+            self.canvas.draw_idle()
+            return
+        low, high = offsets.min(axis=0), offsets.max(axis=0)
+        pad = (high - low) * 0.05 + 1e-9
+        self.extent = (low[0] - pad[0], high[0] + pad[0], low[1] - pad[1], high[1] + pad[1])
+        self.updating_view = True
+        self.scatter_ax.set_xlim(self.extent[0], self.extent[1])
+        self.scatter_ax.set_ylim(self.extent[2], self.extent[3])
+        self.updating_view = False
+        # Home on the toolbar returns to the whole dataset
+        toolbar = self.findChild(NavigationToolbar2QT)
+        toolbar.update()
+        toolbar.push_current()
+
+    def parameter_changed(self):
+        if self.chart_data:
+            self.show_parameter()
+
+    def show_parameter(self):
+        parameter = self.parameter_combo.currentText()
+        histogram = self.chart_data['histograms'][parameter]
+        if histogram['counts']:
+            self.bars.set_data(histogram['counts'], histogram['edges'])
+        else:
+            self.bars.set_data(np.zeros(1), np.arange(2))
+        self.hist_ax.relim()
+        self.hist_ax.autoscale_view()
+        self.hist_ax.set_title(f'{parameter} distribution')
+        self.set_boxes({eq_type: stats[parameter] for eq_type, stats in self.chart_data['box_plots'].items()
+                        if stats[parameter]})
+        self.box_ax.set_title(f'{parameter} by type')
+        self.canvas.draw_idle()
+
+    def set_boxes(self, box_plots):
+        # A handful of artists per Type, replaced rather than clearing the axes
+        for artists in self.boxes.values():
+            for artist in artists:
+                artist.remove()
+        stats = [{'label': eq_type, 'q1': box['q1'], 'med': box['median'], 'q3': box['q3'],
+                  'whislo': box['whisker_low'], 'whishi': box['whisker_high'], 'fliers': []}
+                 for eq_type, box in box_plots.items()]
+        self.boxes = self.box_ax.bxp(stats, showfliers=False, patch_artist=True) if stats else {}
+        for i, patch in enumerate(self.boxes.get('boxes', [])):
+            patch.set_facecolor(TYPE_COLORS[i % len(TYPE_COLORS)])
+            patch.set_alpha(0.6)
+        if stats:
+            self.box_ax.relim()
+            self.box_ax.autoscale_view()
+
+    def view_changed(self, ax):
+        if self.chart_data is not None and not self.updating_view:
+            self.view_timer.start()
+
+    def view_params(self):
+        x_low, x_high = self.scatter_ax.get_xlim()
+        y_low, y_high = self.scatter_ax.get_ylim()
+        if self.extent and (x_low <= self.extent[0] and x_high >= self.extent[1]
+                            and y_low <= self.extent[2] and y_high >= self.extent[3]):
+            return {}
+        params = {}
+        for column, (low, high) in ((SCATTER_X, (x_low, x_high)), (SCATTER_Y, (y_low, y_high))):
+            params[f'{column.lower()}_min'], params[f'{column.lower()}_max'] = view_range(low, high)
+        return params
+
+    def request_view(self):
+        if self.chart_data is None:
+            return
+        self.cancel()
+        self.request(self.view_params(), self.view_loaded)
+
+    def save_background(self, event):
+        self.background = self.canvas.copy_from_bbox(self.scatter_ax.bbox)
+        # Keep a readout on screen across full redraws; the canvas is painted
+        # after this, so no blit is needed
+        self.draw_hover()
+
+    def hover(self, event):
+        if self.background is None or event.inaxes is not self.scatter_ax:
+            return
+        offsets = self.points.get_offsets()
+        nearest = None
+        if len(offsets):
+            pixels = self.scatter_ax.transData.transform(offsets)
+            distances = np.hypot(pixels[:, 0] - event.x, pixels[:, 1] - event.y)
+            index = int(distances.argmin())
+            if distances[index] <= HOVER_RADIUS_PX:
+                nearest = index
+        if nearest is None and not self.readout.get_visible():
+            return
+        if nearest is None:
+            self.highlight.set_data([], [])
+            self.readout.set_visible(False)
+        else:
+            x, y = offsets[nearest]
+            self.highlight.set_data([x], [y])
+            self.readout.xy = (x, y)
+            self.readout.set_text(f'{self.point_types[nearest]}\n{SCATTER_X}: {x:g}\n{SCATTER_Y}: {y:g}')
+            self.readout.set_visible(True)
+        self.blit_hover()
+
+    def draw_hover(self):
+        self.scatter_ax.draw_artist(self.highlight)
+        if self.readout.get_visible():
+            self.scatter_ax.draw_artist(self.readout)
+
+    def blit_hover(self):
+        self.canvas.restore_region(self.background)
+        self.draw_hover()
+        self.canvas.blit(self.scatter_ax.bbox)
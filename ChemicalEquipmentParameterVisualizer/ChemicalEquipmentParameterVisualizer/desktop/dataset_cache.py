@@ -0,0 +1,92 @@
+"""On-disk cache of API responses for the desktop client.
+
+Responses are stored in SQLite under the user's cache directory together with
+their ETag, grouped by the dataset they belong to. A cached response is
+revalidated with If-None-Match before it is used (a 304 costs no body), and is
+served as it is when the server cannot be reached. Past the size limit whole
+datasets are evicted, least recently used first.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+from PyQt5.QtCore import QStandardPaths
+
+# DESKTOP_CACHE_DIR: where the cache lives (defaults to the user cache dir).
+# DESKTOP_CACHE_MB: size limit in megabytes; 0 turns the cache off.
+CACHE_DIR = os.getenv('DESKTOP_CACHE_DIR') or os.path.join(
+    QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation) or os.path.expanduser('~/.cache'),
+    'chemical-equipment-visualizer')
+CACHE_MB = float(os.getenv('DESKTOP_CACHE_MB', '256'))
+
+# Group of the dataset list pages; dataset ids start at 1
+LIST_GROUP = 0
+
+Entry = namedtuple('Entry', 'etag content_type body')
+
+
+class ResponseCache:
+    """Thread-safe: pool threads share one connection behind a lock."""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.path.join(CACHE_DIR, 'responses.sqlite3')
+        self.max_bytes = int(CACHE_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, dataset_id INTEGER NOT NULL, etag TEXT NOT NULL, content_type TEXT,
+            body BLOB NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_dataset ON responses (dataset_id)')
+        # hit: revalidated (304), miss: downloaded, stale: served while offline
+        self.counts = Counter()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT etag, content_type, body FROM responses WHERE key = ?', (key,)).fetchone()
+        return Entry(*row) if row else None
+
+    def record(self, outcome, key=None):
+        with self.lock:
+            self.counts[outcome] += 1
+            if key is not None:
+                self.db.execute('UPDATE responses SET used_at = ? WHERE key = ?', (time.time(), key))
+
+    def put(self, key, dataset_id, etag, content_type, body):
+        with self.lock:
+            self.counts['miss'] += 1
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (key, dataset_id, etag, content_type, body, len(body), time.time()))
+            self.evict(keep=dataset_id)
+
+    def evict(self, keep):
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        groups = self.db.execute('SELECT dataset_id, SUM(size) FROM responses WHERE dataset_id != ? '
+                                 'GROUP BY dataset_id ORDER BY MAX(used_at)', (keep,)).fetchall()
+        for dataset_id, size in groups:
+            self.db.execute('DELETE FROM responses WHERE dataset_id = ?', (dataset_id,))
+            total -= size
+            if total <= self.max_bytes:
+                return
+
+    def drop(self, dataset_id):
+        with self.lock:
+            self.db.execute('DELETE FROM responses WHERE dataset_id = ?', (dataset_id,))
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        served = counts.get('hit', 0) + counts.get('stale', 0)
+        return {**counts, 'entries': entries, 'bytes': size, 'hit_rate': served / total if total else 0.0}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,16 +1,34 @@
 import sys
 import os
-import requests
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QFileDialog, QTableWidget, QTableWidgetItem,
-                             QMessageBox, QTabWidget, QComboBox)
-from PyQt5.QtCore import Qt
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+                             QPushButton, QLabel, QFileDialog, QTableView, QMessageBox, QTabWidget,
+                             QComboBox, QCheckBox)
+from PyQt5.QtCore import Qt, QTimer
 import pandas as pd
 
+from charts import ChartsWidget
+from dataset_cache import CACHE_MB, ResponseCache
+from network import ApiClient
+from table_model import RowsTableModel
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000/api')
+ROWS_PAGE_SIZE = 500
+JOB_POLL_INTERVAL_MS = 1000
+
+# Row tables are requested column-oriented (MessagePack when available),
+# which is several times smaller than a list of row objects
+COLUMNAR_JSON = 'application/vnd.equipment.columnar+json'
+ROWS_ACCEPT = f'application/msgpack, {COLUMNAR_JSON};q=0.9' if msgpack else COLUMNAR_JSON
+
+def decode_rows_page(response):
+    if response.headers.get('Content-Type', '').startswith('application/msgpack'):
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
 
 class EquipmentVisualizerApp(QMainWindow):
     def __init__(self):
@@ -20,6 +38,23 @@ class EquipmentVisualizerApp(QMainWindow):
         
         self.datasets = []
         self.current_dataset = None
+        self.selected_dataset_id = None
+        self.upload_job_id = None
+        
+        # All requests go through one pooled session on worker threads, and
+        # dataset responses through the on-disk cache. dataset_tasks are the
+        # loads for the selected dataset, cancelled when another one is
+        # selected
+        self.api = ApiClient(API_BASE_URL, ResponseCache() if CACHE_MB > 0 else None, self)
+        self.api.connection_changed.connect(self.connection_changed)
+        self.datasets_task = None
+        self.dataset_tasks = []
+        self.job_task = None
+        self.download_task = None
+        
+        self.job_timer = QTimer(self)
+        self.job_timer.setInterval(JOB_POLL_INTERVAL_MS)
+        self.job_timer.timeout.connect(self.poll_upload_job)
         
         self.init_ui()
         self.load_datasets()
@@ -78,6 +113,9 @@ class EquipmentVisualizerApp(QMainWindow):
         self.setup_summary_tab()
         self.setup_data_tab()
         self.setup_charts_tab()
+        
+        # Created up front so the layout doesn't jump when going offline
+        self.statusBar()
     
     def setup_summary_tab(self):
         self.summary_label = QLabel('No dataset loaded')
@@ -85,68 +123,200 @@ class EquipmentVisualizerApp(QMainWindow):
         self.summary_layout.addWidget(self.summary_label)
     
     def setup_data_tab(self):
-        self.data_table = QTableWidget()
+        filter_layout = QHBoxLayout()
+        self.flagged_checkbox = QCheckBox('Flagged equipment only')
+        self.flagged_checkbox.toggled.connect(self.row_filters_changed)
+        filter_layout.addWidget(self.flagged_checkbox)
+        
+        self.type_filter = QComboBox()
+        self.type_filter.addItem('All types', None)
+        self.type_filter.currentIndexChanged.connect(self.row_filters_changed)
+        filter_layout.addWidget(self.type_filter)
+        self.data_layout.addLayout(filter_layout)
+        
+        # Rows are fetched a page at a time as the table scrolls; sorting a
+        # column asks the server for that ordering
+        self.rows_model = RowsTableModel(self.fetch_rows_page, ROWS_PAGE_SIZE, self)
+        self.rows_model.rows_loaded.connect(self.rows_loaded)
+        self.rows_model.fetch_failed.connect(
+            lambda error: QMessageBox.warning(self, 'Error', f'Failed to load rows: {error}'))
+        self.data_table = QTableView()
+        self.data_table.setModel(self.rows_model)
+        self.data_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.data_table.setSortingEnabled(True)
         self.data_layout.addWidget(self.data_table)
+        
+        self.page_label = QLabel('')
+        self.page_label.setAlignment(Qt.AlignCenter)
+        self.data_layout.addWidget(self.page_label)
     
     def setup_charts_tab(self):
-        self.figure = Figure(figsize=(12, 5))
-        self.canvas = FigureCanvas(self.figure)
-        self.charts_layout.addWidget(self.canvas)
+        self.charts = ChartsWidget(self.fetch_chart_data, self)
+        self.charts_layout.addWidget(self.charts)
     
     def upload_csv(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Select CSV File', '', 'CSV Files (*.csv)')
         if file_path:
-            try:
-                with open(file_path, 'rb') as f:
-                    files = {'file': (os.path.basename(file_path), f, 'text/csv')}
-                    response = requests.post(f'{API_BASE_URL}/upload/', files=files)
-                    
-                    if response.status_code == 201:
-                        QMessageBox.information(self, 'Success', 'File uploaded successfully!')
-                        self.load_datasets()
-                    else:
-                        error_msg = response.json().get('error', 'Unknown error')
-                        QMessageBox.warning(self, 'Error', f'Upload failed: {error_msg}')
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'Failed to upload file: {str(e)}')
+            self.upload_button.setEnabled(False)
+            self.upload_button.setText('Uploading...')
+            self.api.upload('upload/', file_path, {'async': 'true'}, on_result=self.upload_sent,
+                            on_error=self.upload_failed, on_progress=self.upload_progress)
     
-    def load_datasets(self):
-        try:
-            response = requests.get(f'{API_BASE_URL}/datasets/')
-            if response.status_code == 200:
-                self.datasets = response.json()
-                self.dataset_combo.clear()
-                
-                if self.datasets:
-                    for dataset in self.datasets:
-                        self.dataset_combo.addItem(dataset['name'], dataset['id'])
-                else:
-                    self.dataset_combo.addItem('No datasets available', None)
+    def upload_progress(self, sent, total):
+        if total:
+            self.upload_button.setText(f'Uploading... {sent * 100 // total}%')
+    
+    def upload_sent(self, result):
+        status, data = result
+        if status == 202:
+            self.upload_job_id = data['id']
+            self.upload_button.setText('Processing...')
+            self.job_timer.start()
+        else:
+            self.finish_upload_job()
+            QMessageBox.warning(self, 'Error', f"Upload failed: {data.get('error', 'Unknown error')}")
+    
+    def upload_failed(self, error):
+        self.finish_upload_job()
+        QMessageBox.critical(self, 'Error', f'Failed to upload file: {error}')
+    
+    def poll_upload_job(self):
+        # Skip a tick rather than stack polls behind a slow response
+        if self.job_task is None:
+            self.job_task = self.api.get(f'jobs/{self.upload_job_id}/', on_result=self.upload_job_polled,
+                                         on_error=self.upload_job_failed)
+    
+    def upload_job_failed(self, error):
+        self.finish_upload_job()
+        QMessageBox.critical(self, 'Error', f'Failed to check upload status: {error}')
+    
+    def upload_job_polled(self, job):
+        self.job_task = None
+        if self.upload_job_id is None:
+            return
+        if job['status'] in ('pending', 'running'):
+            self.upload_button.setText(f"Processing... {job['rows_processed']:,} rows")
+        elif job['status'] == 'succeeded':
+            self.finish_upload_job()
+            if job['duplicate']:
+                QMessageBox.information(self, 'Success', 'This file was already uploaded; the existing dataset is kept.')
             else:
-                QMessageBox.warning(self, 'Error', 'Failed to load datasets')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to connect to server: {str(e)}')
+                QMessageBox.information(self, 'Success', 'File uploaded successfully!')
+            self.load_datasets()
+        else:
+            self.finish_upload_job()
+            QMessageBox.warning(self, 'Error', f"Upload failed: {job['error']}")
     
-    def dataset_selected(self, index):
-        dataset_id = self.dataset_combo.itemData(index)
-        if dataset_id:
-            self.load_dataset_details(dataset_id)
-            self.pdf_button.setEnabled(True)
+    def finish_upload_job(self):
+        self.job_timer.stop()
+        self.job_task = None
+        self.upload_job_id = None
+        self.upload_button.setEnabled(True)
+        self.upload_button.setText('Upload CSV File')
+    
+    def load_datasets(self):
+        if self.datasets_task is not None:
+            self.datasets_task.cancel()
+        self.refresh_button.setEnabled(False)
+        self.datasets_task = self.api.get_pages('datasets/', on_result=self.datasets_loaded,
+                                                on_error=self.datasets_failed)
+    
+    def datasets_loaded(self, datasets):
+        self.datasets_task = None
+        self.refresh_button.setEnabled(True)
+        self.datasets = datasets
+        self.dataset_combo.clear()
+        
+        if self.datasets:
+            for dataset in self.datasets:
+                self.dataset_combo.addItem(dataset['name'], dataset['id'])
+        else:
+            self.dataset_combo.addItem('No datasets available', None)
+    
+    def datasets_failed(self, error):
+        self.datasets_task = None
+        self.refresh_button.setEnabled(True)
+        QMessageBox.critical(self, 'Error', f'Failed to load datasets: {error}')
+    
+    def connection_changed(self, online):
+        if online:
+            self.statusBar().clearMessage()
         else:
-            self.pdf_button.setEnabled(False)
+            self.statusBar().showMessage('Server unreachable - showing cached data')
+    
+    def dataset_selected(self, index):
+        # Whatever the previous selection was still loading is dropped
+        for task in self.dataset_tasks:
+            task.cancel()
+        self.dataset_tasks = []
+        self.rows_model.clear()
+        self.charts.clear()
+        self.current_dataset = None
+        self.pdf_button.setEnabled(False)
+        self.selected_dataset_id = self.dataset_combo.itemData(index)
+        if self.selected_dataset_id:
+            self.load_dataset_details(self.selected_dataset_id)
     
     def load_dataset_details(self, dataset_id):
-        try:
-            response = requests.get(f'{API_BASE_URL}/datasets/{dataset_id}/')
-            if response.status_code == 200:
-                self.current_dataset = response.json()
-                self.display_summary()
-                self.display_data_table()
-                self.display_charts()
-            else:
-                QMessageBox.warning(self, 'Error', 'Failed to load dataset details')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to load dataset: {str(e)}')
+        # The detail, rows and chart data only need the id, so they are
+        # requested together rather than one round trip after another
+        self.summary_label.setText('Loading...')
+        self.dataset_tasks.append(self.api.get(
+            f'datasets/{dataset_id}/', dataset_id=dataset_id, on_result=self.dataset_loaded,
+            on_error=lambda error: QMessageBox.critical(self, 'Error', f'Failed to load dataset: {error}')))
+        self.load_rows()
+        self.charts.load()
+    
+    def dataset_loaded(self, dataset):
+        self.current_dataset = dataset
+        self.pdf_button.setEnabled(True)
+        self.display_summary()
+        self.type_filter.blockSignals(True)
+        for eq_type in sorted(dataset['type_distribution']):
+            self.type_filter.addItem(eq_type, eq_type)
+        self.type_filter.blockSignals(False)
+    
+    def load_rows(self):
+        self.type_filter.blockSignals(True)
+        self.type_filter.clear()
+        self.type_filter.addItem('All types', None)
+        self.type_filter.blockSignals(False)
+        # A new dataset starts in upload order; without blocking, clearing the
+        # indicator would sort (and fetch) on its own
+        header = self.data_table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.blockSignals(False)
+        self.rows_model.load(self.row_filters())
+    
+    def row_filters(self):
+        params = {}
+        if self.flagged_checkbox.isChecked():
+            params['flagged'] = 'true'
+        if self.type_filter.currentData():
+            params['type'] = self.type_filter.currentData()
+        return params
+    
+    def fetch_rows_page(self, params, offset, limit, on_page, on_error):
+        dataset_id = self.selected_dataset_id
+        return self.api.get(f'datasets/{dataset_id}/rows/', params={**params, 'limit': limit, 'offset': offset},
+                            headers={'Accept': ROWS_ACCEPT}, decode=decode_rows_page, dataset_id=dataset_id,
+                            on_result=on_page, on_error=on_error)
+    
+    def fetch_chart_data(self, params, on_result, on_error):
+        dataset_id = self.selected_dataset_id
+        return self.api.get(f'datasets/{dataset_id}/chart-data/', params=params, dataset_id=dataset_id,
+                            on_result=on_result, on_error=on_error)
+    
+    def row_filters_changed(self):
+        if self.selected_dataset_id:
+            params = self.row_filters()
+            if 'ordering' in self.rows_model.params:
+                params['ordering'] = self.rows_model.params['ordering']
+            self.rows_model.load(params)
+    
+    def rows_loaded(self, loaded, total):
+        self.page_label.setText(f'Loaded {loaded:,} of {total:,} rows' if total else 'No rows')
     
     def display_summary(self):
         dataset = self.current_dataset
@@ -160,6 +330,8 @@ class EquipmentVisualizerApp(QMainWindow):
             <li><b>Average Flowrate:</b> {dataset['avg_flowrate']:.2f}</li>
             <li><b>Average Pressure:</b> {dataset['avg_pressure']:.2f}</li>
             <li><b>Average Temperature:</b> {dataset['avg_temperature']:.2f}</li>
+            <li><b>Flagged Equipment:</b> {dataset['flagged_count']}</li>
+            <li><b>Rows with Parse Errors:</b> {dataset['parse_report'].get('error_count', 0)}</li>
         </ul>
         
         <h3>Equipment Type Distribution:</h3>
@@ -173,70 +345,44 @@ class EquipmentVisualizerApp(QMainWindow):
         
         self.summary_label.setText(summary_text)
     
-    def display_data_table(self):
-        csv_data = self.current_dataset['csv_data']
-        
-        if csv_data:
-            headers = list(csv_data[0].keys())
-            self.data_table.setColumnCount(len(headers))
-            self.data_table.setRowCount(len(csv_data))
-            self.data_table.setHorizontalHeaderLabels(headers)
-            
-            for row_idx, row_data in enumerate(csv_data):
-                for col_idx, header in enumerate(headers):
-                    item = QTableWidgetItem(str(row_data[header]))
-                    self.data_table.setItem(row_idx, col_idx, item)
+    def download_pdf(self):
+        if self.current_dataset and self.download_task is None:
+            dataset_id = self.current_dataset['id']
+            params = {'mode': 'alerts'} if self.flagged_checkbox.isChecked() else {}
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, 'Save PDF Report', f"{self.current_dataset['name']}_report.pdf", 
+                'PDF Files (*.pdf)'
+            )
             
-            self.data_table.resizeColumnsToContents()
+            if file_path:
+                # Streamed to disk in chunks; the download carries on if
+                # another dataset is selected meanwhile
+                self.pdf_button.setText('Downloading...')
+                self.download_task = self.api.download(
+                    f'datasets/{dataset_id}/generate_pdf/', file_path, params, on_result=self.pdf_saved,
+                    on_error=self.pdf_failed, on_progress=self.pdf_progress)
     
-    def display_charts(self):
-        dataset = self.current_dataset
-        self.figure.clear()
-        
-        ax1 = self.figure.add_subplot(1, 2, 1)
-        params = ['Flowrate', 'Pressure', 'Temperature']
-        values = [dataset['avg_flowrate'], dataset['avg_pressure'], dataset['avg_temperature']]
-        colors = ['#3498db', '#e74c3c', '#f39c12']
-        
-        ax1.bar(params, values, color=colors, alpha=0.7)
-        ax1.set_title('Average Values by Parameter')
-        ax1.set_ylabel('Value')
-        ax1.grid(True, alpha=0.3)
-        
-        ax2 = self.figure.add_subplot(1, 2, 2)
-        type_dist = dataset['type_distribution']
-        
-        if type_dist:
-            labels = list(type_dist.keys())
-            sizes = list(type_dist.values())
-            colors_pie = ['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6']
-            
-            ax2.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors_pie[:len(labels)], startangle=90)
-            ax2.set_title('Equipment Type Distribution')
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def pdf_progress(self, received, total):
+        # Reports are streamed without a Content-Length
+        progress = f'{received * 100 // total}%' if total else f'{received // 1024:,} KB'
+        self.pdf_button.setText(f'Downloading... {progress}')
     
-    def download_pdf(self):
-        if self.current_dataset:
-            dataset_id = self.current_dataset['id']
-            try:
-                response = requests.get(f'{API_BASE_URL}/datasets/{dataset_id}/generate_pdf/', stream=True)
-                
-                if response.status_code == 200:
-                    file_path, _ = QFileDialog.getSaveFileName(
-                        self, 'Save PDF Report', f"{self.current_dataset['name']}_report.pdf", 
-                        'PDF Files (*.pdf)'
-                    )
-                    
-                    if file_path:
-                        with open(file_path, 'wb') as f:
-                            f.write(response.content)
-                        QMessageBox.information(self, 'Success', f'PDF saved to {file_path}')
-                else:
-                    QMessageBox.warning(self, 'Error', 'Failed to generate PDF')
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'Failed to download PDF: {str(e)}')
+    def pdf_saved(self, file_path):
+        self.finish_download()
+        QMessageBox.information(self, 'Success', f'PDF saved to {file_path}')
+    
+    def pdf_failed(self, error):
+        self.finish_download()
+        QMessageBox.critical(self, 'Error', f'Failed to download PDF: {error}')
+    
+    def finish_download(self):
+        self.download_task = None
+        self.pdf_button.setText('Download PDF Report')
+    
+    def closeEvent(self, event):
+        self.job_timer.stop()
+        self.api.shutdown()
+        super().closeEvent(event)
 
 def main():
     app = QApplication(sys.argv)
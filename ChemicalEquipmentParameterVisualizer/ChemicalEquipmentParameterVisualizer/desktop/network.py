@@ -0,0 +1,286 @@
+"""Background HTTP for the desktop client.
+
+Requests run on a QThreadPool and share one requests.Session, so connections
+to the API are kept alive and reused instead of opened per call. Each call
+returns a Task whose callbacks run on the GUI thread; cancelling it drops its
+outcome and stops an upload or download at the next chunk. GETs tied to a
+dataset go through the ResponseCache when one is given.
+"""
+import io
+import os
+import threading
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from dataset_cache import LIST_GROUP
+
+# (connect, read) seconds; the read timeout applies between bytes, so long
+# streamed downloads are fine as long as data keeps arriving
+TIMEOUT = (5, 60)
+POOL_SIZE = 4
+CHUNK_SIZE = 64 * 1024
+
+
+class Cancelled(Exception):
+    pass
+
+
+class ApiError(Exception):
+    pass
+
+
+def raise_for_error(response):
+    if response.status_code < 400:
+        return
+    try:
+        message = response.json().get('error') or response.json().get('detail')
+    except ValueError:
+        message = None
+    raise ApiError(message or f'HTTP {response.status_code}')
+
+
+def decode_json(response):
+    return response.json()
+
+
+def cached_response(entry):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = entry.content_type
+    response._content = entry.body
+    return response
+
+
+class TaskSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+
+class Task(QRunnable):
+    """Runs ``fn(task, *args)`` on the pool. ``fn`` calls ``report`` as it
+    makes progress, which also raises Cancelled once ``cancel`` is called."""
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+        self.cancelled = threading.Event()
+        self.last_percent = -1
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def report(self, done, total):
+        self.check()
+        # One signal per percent is plenty for a progress label
+        percent = done * 100 // total if total else -1
+        if percent != self.last_percent or not total:
+            self.last_percent = percent
+            self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class MultipartFile:
+    """multipart/form-data body holding one file, read from disk a chunk at
+    a time as it is sent and reporting progress to its task."""
+
+    def __init__(self, task, field, path, content_type='text/csv'):
+        self.task = task
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        head = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                f'filename="{os.path.basename(path)}"\r\nContent-Type: {content_type}\r\n\r\n').encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        self.size = len(head) + os.path.getsize(path) + len(tail)
+        self.parts = [io.BytesIO(head), open(path, 'rb'), io.BytesIO(tail)]
+        self.sent = 0
+
+    def __len__(self):
+        return self.size
+
+    def read(self, size=-1):
+        chunk = b''
+        while self.parts and (size < 0 or len(chunk) < size):
+            data = self.parts[0].read(size - len(chunk) if size >= 0 else -1)
+            if not data:
+                self.parts.pop(0).close()
+                continue
+            chunk += data
+        self.sent += len(chunk)
+        self.task.report(self.sent, self.size)
+        return chunk
+
+    def close(self):
+        for part in self.parts:
+            part.close()
+        self.parts = []
+
+
+class ApiClient(QObject):
+    # False while responses are being served from the cache because the
+    # server cannot be reached
+    connection_changed = pyqtSignal(bool)
+
+    def __init__(self, base_url, cache=None, parent=None):
+        super().__init__(parent)
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.online = True
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(POOL_SIZE)
+        self.tasks = set()
+
+    def url(self, path):
+        return path if '://' in path else f"{self.base_url}/{path.lstrip('/')}"
+
+    def start(self, fn, *args, on_result=None, on_error=None, on_progress=None):
+        """Run ``fn(task, *args)`` on the pool. The callbacks are delivered
+        on the GUI thread, and not at all once the task is cancelled."""
+        task = Task(fn, *args)
+        for signal, callback in ((task.signals.result, on_result), (task.signals.error, on_error),
+                                 (task.signals.progress, on_progress)):
+            if callback is not None:
+                signal.connect(lambda *values, callback=callback: task.cancelled.is_set() or callback(*values))
+        task.signals.finished.connect(lambda: self.tasks.discard(task))
+        self.tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def get(self, path, params=None, headers=None, decode=decode_json, dataset_id=None, **callbacks):
+        """GET ``path``; responses of a ``dataset_id`` are cached."""
+        return self.start(self.fetch, path, params, headers, decode, dataset_id, **callbacks)
+
+    def get_pages(self, path, params=None, **callbacks):
+        """GET every page of a paginated list and return their results. The
+        pages are cached as the dataset list."""
+        return self.start(self.fetch_pages, path, params, **callbacks)
+
+    def upload(self, path, file_path, params=None, **callbacks):
+        """POST ``file_path`` as the ``file`` field; the result is
+        (status code, decoded JSON body)."""
+        return self.start(self.send_file, path, file_path, params, **callbacks)
+
+    def download(self, path, file_path, params=None, **callbacks):
+        return self.start(self.save_to, path, file_path, params, **callbacks)
+
+    def shutdown(self):
+        for task in list(self.tasks):
+            task.cancel()
+        self.pool.waitForDone(int(TIMEOUT[0] * 1000))
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    # The methods below run on the pool
+
+    def fetch(self, task, path, params, headers, decode, dataset_id):
+        response = self.send_get(self.url(path), params, headers, dataset_id)
+        task.check()
+        raise_for_error(response)
+        return decode(response)
+
+    def send_get(self, url, params, headers, dataset_id):
+        if self.cache is None or dataset_id is None:
+            response = self.session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            self.set_online(True)
+            return response
+        headers = dict(headers or {})
+        # The representation depends on the URL and the Accept header
+        key = f"{headers.get('Accept', '')} {requests.Request('GET', url, params=params).prepare().url}"
+        entry = self.cache.get(key)
+        if entry is not None:
+            headers['If-None-Match'] = entry.etag
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if entry is None:
+                raise
+            self.set_online(False)
+            self.cache.record('stale', key)
+            return cached_response(entry)
+        self.set_online(True)
+        if response.status_code == 304 and entry is not None:
+            self.cache.record('hit', key)
+            return cached_response(entry)
+        if response.status_code == 404 and dataset_id != LIST_GROUP:
+            # Deleted on the server (e.g. by retention)
+            self.cache.drop(dataset_id)
+        elif response.status_code == 200 and 'ETag' in response.headers:
+            self.cache.put(key, dataset_id, response.headers['ETag'], response.headers.get('Content-Type'),
+                           response.content)
+        return response
+
+    def set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self.connection_changed.emit(online)
+
+    def fetch_pages(self, task, path, params):
+        results = []
+        url = self.url(path)
+        while url:
+            response = self.send_get(url, params, None, LIST_GROUP)
+            task.check()
+            raise_for_error(response)
+            page = response.json()
+            results.extend(page['results'])
+            # The next link already carries the query
+            url, params = page['next'], None
+        return results
+
+    def send_file(self, task, path, file_path, params):
+        body = MultipartFile(task, 'file', file_path)
+        try:
+            response = self.session.post(self.url(path), params=params, data=body, timeout=TIMEOUT,
+                                         headers={'Content-Type': body.content_type})
+        finally:
+            body.close()
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {'error': f'HTTP {response.status_code}'}
+
+    def save_to(self, task, path, file_path, params):
+        partial = f'{file_path}.part'
+        with self.session.get(self.url(path), params=params, stream=True, timeout=TIMEOUT) as response:
+            raise_for_error(response)
+            total = int(response.headers.get('Content-Length') or 0)
+            done = 0
+            try:
+                with open(partial, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        done += len(chunk)
+                        task.report(done, total)
+                os.replace(partial, file_path)
+            except BaseException:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+        return file_path
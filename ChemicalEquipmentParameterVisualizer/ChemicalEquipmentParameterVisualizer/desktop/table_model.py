@@ -0,0 +1,189 @@
+"""Table model for the equipment rows of one dataset.
+
+Rows are kept column-wise in NumPy arrays and fetched from the server a page
+at a time as the view scrolls to the bottom (canFetchMore / fetchMore), so
+opening a dataset costs one page however large it is. Pages arrive
+asynchronously; one is in flight at a time. Sorting and filtering
+are parameters of the rows endpoint: changing them resets the model and
+fetches again from the first row.
+"""
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+PAGE_SIZE = 500
+
+
+class ColumnStore:
+    """Rows as one array per column: float64 for the numeric columns (NaN
+    when missing), an object array of names, and Type as int32 codes into
+    the list of distinct types."""
+
+    def __init__(self, capacity=0):
+        self.length = 0
+        self.names = np.empty(capacity, dtype=object)
+        self.type_codes = np.empty(capacity, dtype=np.int32)
+        self.types = []
+        self.type_index = {}
+        self.numbers = {col: np.empty(capacity, dtype=np.float64) for col in NUMERIC_COLUMNS}
+
+    def reserve(self, capacity):
+        if capacity <= len(self.names):
+            return
+        self.names = np.resize(self.names, capacity)
+        self.type_codes = np.resize(self.type_codes, capacity)
+        self.numbers = {col: np.resize(values, capacity) for col, values in self.numbers.items()}
+
+    def append(self, columns):
+        count = len(columns['Equipment Name'])
+        end = self.length + count
+        if end > len(self.names):
+            # The server reports the total up front, so this only happens
+            # when it changed between pages
+            self.reserve(max(end, 2 * len(self.names)))
+        self.names[self.length:end] = columns['Equipment Name']
+        type_index = self.type_index
+        self.type_codes[self.length:end] = np.fromiter(
+            (type_index.setdefault(eq_type, len(type_index)) for eq_type in columns['Type']), np.int32, count)
+        if len(type_index) != len(self.types):
+            self.types = list(type_index)
+        for col in NUMERIC_COLUMNS:
+            self.numbers[col][self.length:end] = np.array(columns[col], dtype=np.float64)
+        self.length = end
+
+    def value(self, row, column):
+        if column == 'Equipment Name':
+            return self.names[row]
+        if column == 'Type':
+            return self.types[self.type_codes[row]]
+        return self.numbers[column][row]
+
+    @property
+    def nbytes(self):
+        return (self.names.nbytes + self.type_codes.nbytes
+                + sum(values.nbytes for values in self.numbers.values()))
+
+
+class RowsTableModel(QAbstractTableModel):
+    """``fetch_page(params, offset, limit, on_page, on_error)`` starts fetching
+    a rows page in the columnar shape of the API (``{'count': total,
+    'results': {column: [...]}}``) and later calls ``on_page(page)`` or
+    ``on_error(message)`` on the GUI thread. It may return a handle with
+    ``cancel()``, which is called when the page is no longer wanted."""
+
+    rows_loaded = pyqtSignal(int, int)
+    fetch_failed = pyqtSignal(str)
+
+    def __init__(self, fetch_page, page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.params = {}
+        self.store = ColumnStore()
+        self.total = 0
+        self.active = False
+        # Pages from an earlier load() are dropped by comparing generations
+        self.generation = 0
+        self.pending = None
+        self.loading = False
+
+    def load(self, params=None):
+        """Start over from the first row with the given filter and ordering
+        parameters."""
+        self.reset(active=True)
+        self.params = dict(params or {})
+        self.request_page()
+
+    def clear(self):
+        self.reset(active=False)
+        self.rows_loaded.emit(0, 0)
+
+    def reset(self, active):
+        self.cancel()
+        self.beginResetModel()
+        self.store = ColumnStore()
+        self.total = 0
+        self.active = active
+        self.endResetModel()
+
+    def cancel(self):
+        self.generation += 1
+        self.loading = False
+        if self.pending is not None and hasattr(self.pending, 'cancel'):
+            self.pending.cancel()
+        self.pending = None
+
+    def request_page(self):
+        generation = self.generation
+        self.loading = True
+        handle = self.fetch_page(self.params, self.store.length, self.page_size,
+                                 lambda page: self.page_received(generation, page),
+                                 lambda message: self.page_failed(generation, message))
+        # The callbacks may already have run
+        self.pending = handle if self.loading and generation == self.generation else None
+
+    def page_received(self, generation, page):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.pending = None
+        self.total = page['count']
+        count = len(page['results']['Equipment Name'])
+        if count:
+            self.store.reserve(self.total)
+            first = self.store.length
+            self.beginInsertRows(QModelIndex(), first, first + count - 1)
+            self.store.append(page['results'])
+            self.endInsertRows()
+        else:
+            self.total = self.store.length
+        self.rows_loaded.emit(self.store.length, self.total)
+
+    def page_failed(self, generation, message):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.pending = None
+        # Stop fetching until the next load()
+        self.total = self.store.length
+        self.fetch_failed.emit(message)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.store.length
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.active and not self.loading and self.store.length < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.request_page()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = COLUMNS[index.column()]
+        if role == Qt.DisplayRole:
+            value = self.store.value(index.row(), column)
+            if column in NUMERIC_COLUMNS:
+                return '' if np.isnan(value) else str(value)
+            return value
+        if role == Qt.TextAlignmentRole and column in NUMERIC_COLUMNS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not self.active:
+            return
+        params = {key: value for key, value in self.params.items() if key != 'ordering'}
+        if column >= 0:
+            params['ordering'] = f"{'-' if order == Qt.DescendingOrder else ''}{COLUMNS[column]}"
+        self.load(params)
@@ -1,22 +1,35 @@
 import { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
-import { getDatasetDetail, downloadPDF } from '../services/api';
-import { Chart as ChartJS, CategoryScale, LinearScale, BarElement, ArcElement, Title, Tooltip, Legend } from 'chart.js';
-import { Bar, Pie } from 'react-chartjs-2';
+import { getDatasetDetail, getDatasetRows, getChartData, downloadPDF } from '../services/api';
+import { Chart as ChartJS, CategoryScale, LinearScale, BarElement, ArcElement, PointElement, Title, Tooltip, Legend } from 'chart.js';
+import { Bar, Pie, Scatter } from 'react-chartjs-2';
 import './DatasetDetail.css';
 
-ChartJS.register(CategoryScale, LinearScale, BarElement, ArcElement, Title, Tooltip, Legend);
+ChartJS.register(CategoryScale, LinearScale, BarElement, ArcElement, PointElement, Title, Tooltip, Legend);
+
+const PAGE_SIZE = 100;
+const CHART_POINTS = 1000;
 
 function DatasetDetail() {
   const { id } = useParams();
   const [dataset, setDataset] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [rows, setRows] = useState([]);
+  const [rowCount, setRowCount] = useState(0);
+  const [offset, setOffset] = useState(0);
+  const [chartData, setChartData] = useState(null);
+  const [flaggedOnly, setFlaggedOnly] = useState(false);
 
   useEffect(() => {
     fetchDataset();
+    fetchChartData();
   }, [id]);
 
+  useEffect(() => {
+    fetchRows();
+  }, [id, offset, flaggedOnly]);
+
   const fetchDataset = async () => {
     try {
       const data = await getDatasetDetail(id);
@@ -28,8 +41,33 @@ function DatasetDetail() {
     }
   };
 
+  const fetchRows = async () => {
+    try {
+      const params = { limit: PAGE_SIZE, offset };
+      if (flaggedOnly) params.flagged = true;
+      const data = await getDatasetRows(id, params);
+      setRows(data.results);
+      setRowCount(data.count);
+    } catch (err) {
+      setError('Failed to load equipment rows');
+    }
+  };
+
+  const fetchChartData = async () => {
+    try {
+      setChartData(await getChartData(id, { points: CHART_POINTS }));
+    } catch (err) {
+      setChartData(null);
+    }
+  };
+
+  const handleFlaggedOnly = (e) => {
+    setFlaggedOnly(e.target.checked);
+    setOffset(0);
+  };
+
   const handleDownloadPDF = () => {
-    downloadPDF(id, `${dataset.name}_report.pdf`);
+    downloadPDF(id, `${dataset.name}_report.pdf`, flaggedOnly ? { mode: 'alerts' } : {});
   };
 
   if (loading) return <div className="loading">Loading...</div>;
@@ -68,6 +106,38 @@ function DatasetDetail() {
     ],
   };
 
+  const scatter = chartData?.scatter;
+  const scatterData = scatter && {
+    datasets: [
+      {
+        label: `${scatter.y} vs ${scatter.x}`,
+        data: scatter.points[scatter.x].map((x, i) => ({ x, y: scatter.points[scatter.y][i] })),
+        backgroundColor: 'rgba(212, 168, 67, 0.6)',
+        pointRadius: 2,
+      },
+    ],
+  };
+  const scatterOptions = scatter && {
+    scales: {
+      x: { title: { display: true, text: scatter.x } },
+      y: { title: { display: true, text: scatter.y } },
+    },
+  };
+
+  const pressureHistogram = chartData?.histograms.Pressure;
+  const histogramData = pressureHistogram && {
+    labels: pressureHistogram.counts.map((_, i) => pressureHistogram.edges[i].toFixed(1)),
+    datasets: [
+      {
+        label: 'Equipment Count',
+        data: pressureHistogram.counts,
+        backgroundColor: 'rgba(184, 146, 47, 0.7)',
+        borderColor: '#b8922f',
+        borderWidth: 1,
+      },
+    ],
+  };
+
   return (
     <div className="dataset-detail">
       <div className="header">
@@ -75,6 +145,13 @@ function DatasetDetail() {
         <button onClick={handleDownloadPDF} className="pdf-button">Download PDF Report</button>
       </div>
 
+      {dataset.parse_report?.error_count > 0 && (
+        <p className="parse-warning">
+          {dataset.parse_report.error_count} row problem(s) while parsing: malformed lines were skipped and values
+          that are not numbers left empty.
+        </p>
+      )}
+
       <div className="summary-cards">
         <div className="card">
           <h3>Total Equipment</h3>
@@ -92,6 +169,10 @@ function DatasetDetail() {
           <h3>Avg Temperature</h3>
           <p className="big-number">{dataset.avg_temperature.toFixed(2)}</p>
         </div>
+        <div className="card">
+          <h3>Flagged Equipment</h3>
+          <p className="big-number">{dataset.flagged_count}</p>
+        </div>
       </div>
 
       <div className="charts">
@@ -103,10 +184,26 @@ function DatasetDetail() {
           <h3>Equipment Type Distribution</h3>
           <Pie data={typeData} />
         </div>
+        {scatterData && (
+          <div className="chart-container">
+            <h3>{scatter.y} vs {scatter.x} ({scatter.points[scatter.x].length} of {scatter.total_points} points)</h3>
+            <Scatter data={scatterData} options={scatterOptions} />
+          </div>
+        )}
+        {histogramData && (
+          <div className="chart-container">
+            <h3>Pressure Distribution</h3>
+            <Bar data={histogramData} />
+          </div>
+        )}
       </div>
 
       <div className="equipment-table">
         <h3>Equipment Details</h3>
+        <label className="flagged-toggle">
+          <input type="checkbox" checked={flaggedOnly} onChange={handleFlaggedOnly} />
+          Flagged only
+        </label>
         <table>
           <thead>
             <tr>
@@ -118,8 +215,8 @@ function DatasetDetail() {
             </tr>
           </thead>
           <tbody>
-            {dataset.csv_data.map((row, index) => (
-              <tr key={index}>
+            {rows.map((row, index) => (
+              <tr key={offset + index}>
                 <td>{row['Equipment Name']}</td>
                 <td>{row.Type}</td>
                 <td>{row.Flowrate}</td>
@@ -129,6 +226,13 @@ function DatasetDetail() {
             ))}
           </tbody>
         </table>
+        <div className="pagination">
+          <button onClick={() => setOffset(offset - PAGE_SIZE)} disabled={offset === 0}>Previous</button>
+          <span>
+            {rowCount === 0 ? 0 : offset + 1}-{Math.min(offset + PAGE_SIZE, rowCount)} of {rowCount}
+          </span>
+          <button onClick={() => setOffset(offset + PAGE_SIZE)} disabled={offset + PAGE_SIZE >= rowCount}>Next</button>
+        </div>
       </div>
     </div>
   );
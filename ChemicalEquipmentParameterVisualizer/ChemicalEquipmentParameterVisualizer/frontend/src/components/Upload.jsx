@@ -1,8 +1,12 @@
 import { useState } from 'react';
-import { uploadCSV } from '../services/api';
+import { uploadCSV, getJob } from '../services/api';
 import { useNavigate } from 'react-router-dom';
 import './Upload.css';
 
+const POLL_INTERVAL = 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 function Upload() {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
@@ -24,10 +28,18 @@ function Upload() {
     setMessage('');
 
     try {
-      const result = await uploadCSV(file);
-      setMessage('File uploaded successfully!');
+      let job = await uploadCSV(file);
+      while (job.status === 'pending' || job.status === 'running') {
+        setMessage(`Processing... ${job.rows_processed.toLocaleString()} rows`);
+        await sleep(POLL_INTERVAL);
+        job = await getJob(job.id);
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
+      setMessage(job.duplicate ? 'This file was already uploaded, opening the existing dataset.' : 'File uploaded successfully!');
       setTimeout(() => {
-        navigate(`/datasets/${result.id}`);
+        navigate(`/datasets/${job.dataset}`);
       }, 1000);
     } catch (error) {
       setMessage(`Error: ${error.response?.data?.error || error.message}`);
@@ -44,6 +44,7 @@ export const uploadCSV = async (file) => {
   const formData = new FormData();
   formData.append('file', file);
   const response = await api.post('/upload/', formData, {
+    params: { async: 'true' },
     headers: {
       'Content-Type': 'multipart/form-data',
     },
@@ -51,23 +52,53 @@ export const uploadCSV = async (file) => {
   return response.data;
 };
 
-export const getDatasets = async () => {
-  const response = await api.get('/datasets/');
+export const getJob = async (id) => {
+  const response = await api.get(`/jobs/${id}/`);
   return response.data;
 };
 
+// The list is keyset-paginated; the history view only shows the newest page
+export const getDatasets = async (params = {}) => {
+  const response = await api.get('/datasets/', { params });
+  return response.data.results;
+};
+
 export const getDatasetDetail = async (id) => {
   const response = await api.get(`/datasets/${id}/`);
   return response.data;
 };
 
+// Rows are fetched column-oriented (one array per column) to avoid repeating
+// every column name on every row, then zipped back into row objects.
+const COLUMNAR_JSON = 'application/vnd.equipment.columnar+json';
+
+const columnsToRows = (columns) => {
+  const names = Object.keys(columns);
+  const length = names.length ? columns[names[0]].length : 0;
+  return Array.from({ length }, (_, i) => Object.fromEntries(names.map((name) => [name, columns[name][i]])));
+};
+
+export const getDatasetRows = async (id, params = {}) => {
+  const response = await api.get(`/datasets/${id}/rows/`, {
+    params,
+    headers: { Accept: COLUMNAR_JSON },
+  });
+  return { ...response.data, results: columnsToRows(response.data.results) };
+};
+
+export const getChartData = async (id, params = {}) => {
+  const response = await api.get(`/datasets/${id}/chart-data/`, { params });
+  return response.data;
+};
+
 export const getDatasetSummary = async (id) => {
   const response = await api.get(`/datasets/${id}/summary/`);
   return response.data;
 };
 
-export const downloadPDF = async (id, filename) => {
+export const downloadPDF = async (id, filename, params = {}) => {
   const response = await api.get(`/datasets/${id}/generate_pdf/`, {
+    params,
     responseType: 'blob',
   });
   const url = window.URL.createObjectURL(new Blob([response.data]));